@@ -5,9 +5,10 @@ import config
 import utils
 
 args = config.parse_arguments()
+utils.open_storage(args.storage, args.save_file)
+utils.LazyRecords.max_loaded = args.max_loaded
 if args.wipe:
     utils.wipe_data(args.wipe)
-utils.save_file_name = args.save_file
 
 import bot  # prevents errors with wiping/loading data since the import loads the data
 current_bot = bot.bots[args.bot](args)
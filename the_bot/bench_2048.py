@@ -0,0 +1,73 @@
+"""
+benchmarks 2048 boards by replaying recorded games with the list of cells Board,
+the BitBoard and the NumpyBoard (if numpy is installed)
+run with python the_bot/bench_2048.py {number_of_moves} {number_of_games}
+"""
+import importlib.util
+import random
+import sys
+import time
+
+from game_2048 import classes
+
+MODE_NAMES = ("normal", "65536", str(2 ** 20), "8x8", "16x16")
+
+
+def record(mode_name, seed, number_of_moves):
+    """plays random moves on a game made with seed, returns what is needed to replay it"""
+    game = classes.Game("bench", mode_name, seed)
+    chooser = random.Random(seed)
+    directions = [direction.value for direction in classes.Directions]
+    for _ in range(number_of_moves):
+        if not game.board.check_can_move():
+            break
+        game.move_direction(chooser.choice(directions))
+    return mode_name, game.seed, str(game.moves)
+
+
+def board_classes(mode_name):
+    """returns the boards to compare for a mode"""
+    boards = [classes.BitBoard]
+    if classes.Game.modes[mode_name].size <= 6:
+        boards.insert(0, classes.Board)
+    if importlib.util.find_spec("numpy"):
+        from game_2048.numpy_board import NumpyBoard
+        boards.append(NumpyBoard)
+    return boards
+
+
+def main(number_of_moves=200, number_of_games=10):
+    for mode_name in MODE_NAMES:
+        if mode_name not in classes.Game.modes:
+            continue
+        recorded_games = [
+            record(mode_name, seed, number_of_moves) for seed in range(number_of_games)
+        ]
+        number_of_moves_played = sum(len(moves) for _, _, moves in recorded_games)
+        expected_games = [
+            classes.Game.replay("bench", mode_name, seed, moves)
+            for mode_name, seed, moves in recorded_games
+        ]
+
+        for board_class in board_classes(mode_name):
+            start = time.perf_counter()
+            games = [
+                classes.Game.replay("bench", mode_name, seed, moves, board_class)
+                for mode_name, seed, moves in recorded_games
+            ]
+            seconds = time.perf_counter() - start
+
+            for game, expected_game in zip(games, expected_games):
+                if (
+                    game.board.values != expected_game.board.values or
+                    game.score != expected_game.score
+                ):
+                    raise AssertionError(f"{board_class.__name__} replayed {mode_name} differently")
+            print(
+                f"{mode_name} {board_class.__name__}: "
+                f"{number_of_moves_played / seconds:.0f} moves per second"
+            )
+
+
+if __name__ == "__main__":
+    main(*[int(arg) for arg in sys.argv[1:]])
@@ -0,0 +1,79 @@
+"""
+benchmarks parsing messages with utils.CommandParser against the old generator parser
+run with python the_bot/bench_parser.py
+"""
+import sys
+import timeit
+
+import utils
+
+MESSAGES = (
+    "eco mine",
+    "2048 test u",
+    "rpg equip boring starter weapon",
+    "/rename a much longer conversation name with plenty of words in it",
+    "",
+)
+
+
+def generator_parser(command_text):
+    """the generator based parser CommandParser replaced, kept for comparison"""
+    commands = utils.clean(command_text)
+    current_index = 0
+    val = None
+    while True:
+        if isinstance(val, int):
+            current_index += val
+            current_index = utils.clamp(current_index, 0, len(commands))
+            item = utils.get_item(commands, indexes=(current_index, ))
+        elif val == "remaining":
+            item = utils.join_items(*commands[current_index:], separator=" ", newlines=0)
+        elif val == "all":
+            item = commands
+        elif val == "raw":
+            item = command_text
+        else:
+            item = utils.get_item(commands, indexes=(current_index, ))
+            current_index += 1
+        val = yield item
+
+
+def parse_with_generator(text):
+    """parses a message the way handlers and managers use the parser"""
+    commands = generator_parser(text)
+    next(commands)
+    next(commands)
+    commands.send(-1)
+    next(commands)
+    return commands.send("remaining")
+
+
+def parse_with_command_parser(text):
+    """parses a message the way handlers and managers use the parser"""
+    commands = utils.CommandParser(text)
+    next(commands)
+    next(commands)
+    commands.rewind()
+    next(commands)
+    return commands.remaining()
+
+
+def main(number=20000):
+    for text in MESSAGES:
+        if parse_with_generator(text) != parse_with_command_parser(text):
+            raise AssertionError(f"parsers disagree on {text!r}")
+
+    print(f"parsing {len(MESSAGES)} messages {number} times")
+    for name, function in (
+        ("generator", parse_with_generator),
+        ("CommandParser", parse_with_command_parser),
+    ):
+        seconds = min(timeit.repeat(
+            lambda: [function(text) for text in MESSAGES], number=number, repeat=3
+        ))
+        per_message = seconds / (number * len(MESSAGES)) * 1e6
+        print(f"{name}: {per_message:.2f} microseconds per message")
+
+
+if __name__ == "__main__":
+    main(*[int(arg) for arg in sys.argv[1:]])
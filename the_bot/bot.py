@@ -4,6 +4,9 @@ bot for hangouts
 import handler
 import hangups
 import asyncio
+import image_cache
+import inbox
+import outbox
 import utils
 import sys
 
@@ -21,6 +24,18 @@ class Bot:
         self.cookies = hangups.get_auth_stdin(args.token, True)
         self.client = hangups.Client(self.cookies)
         self.handler = handler.Handler(args)
+        self.tasks = set()
+        self.workers = args.workers
+        self.inbox = inbox.Inbox(args.queue_size, args.shed_policy)
+        self.outbox = outbox.Outbox(
+            window=args.send_window / 1000, rate=args.send_rate,
+            burst=args.send_burst, retries=args.send_retries,
+        )
+        self.image_cache = image_cache.ImageCache(self.client)
+        self.image_cache.preload(
+            handler.Handler.image_folder + image_name
+            for image_name in handler.Handler.images.values()
+        )
 
     def run(self):
         """main loop for running bot"""
@@ -28,6 +43,7 @@ class Bot:
 
         loop = asyncio.get_event_loop()
         loop.run_until_complete(self.client.connect())
+        self.handler.saver.stop()
         sys.exit(0)
 
     async def _on_connect(self):
@@ -36,35 +52,59 @@ class Bot:
             await hangups.build_user_conversation_list(self.client)
         )
         self._convo_list.on_event.add_observer(self._on_event)
+        # workers handle messages concurrently so slow commands do not hold up other users
+        for _ in range(self.workers):
+            self.tasks.add(asyncio.ensure_future(self.worker()))
         print("Connected!")
 
     async def _on_event(self, event):
         """called when there is an event in hangouts"""
+        if not isinstance(event, hangups.ChatMessageEvent):
+            return
         user, conv = utils.get_user_and_conv(self._convo_list, event)
-        output_text = ""
+        if user.is_self or utils.user_in(self.ignore, user):
+            if not (user.is_self and event.text.split()[0].lower() == "sudo"):
+                return
 
-        # handles messages
-        if (isinstance(event, hangups.ChatMessageEvent)):
-            if user.is_self or utils.user_in(self.ignore, user):
-                if not (user.is_self and event.text.split()[0].lower() == "sudo"):
-                    return
-            output_text = await self.handler.handle_message(event, bot=self)
+        if not self.inbox.put(event.conversation_id, event):
+            await self.send_message("I'm busy right now, try again in a bit", conv)
 
-        # sends message to hangouts
-        if output_text:
-            await self.send_message(output_text, conv)
+    async def worker(self):
+        """handles messages from the inbox"""
+        while True:
+            event = await self.inbox.get()
+            try:
+                await self.handle_event(event)
+            except Exception as error:
+                print(f"error handling {event.text!r}: {error!r}")
+            finally:
+                self.inbox.done()
+
+    async def handle_event(self, event):
+        """handles a message and sends the reply"""
+        user, conv = utils.get_user_and_conv(self._convo_list, event)
+        # the reply is sent while holding the lock so replies to a player stay in order
+        async with self.handler.lock(user.id_[0], event.text):
+            output_text = await self.handler.handle_message(event, bot=self)
+            if output_text:
+                await self.send_message(output_text, conv)
 
     async def send_message(self, message, conv):
-        await conv.send_message(utils.to_seg(message))
+        """queues a message, replies close together are sent as one message"""
+        self.outbox.put(conv, message)
 
-    async def send_image(self, image, conv):
-        await conv.send_message(utils.to_seg(""), image)
+    async def send_image(self, image_path, conv):
+        """queues an image, which is only uploaded the first time it is sent"""
+        image_id = await self.image_cache.image_id(image_path)
+        self.outbox.put(conv, image_id=image_id)
 
     async def rename_conv(self, new_name, conv):
         await conv.rename(new_name)
         return "Sucessfully renamed"
 
     async def quit(self):
+        self.handler.saver.stop()
+        await self.outbox.flush()
         await self.client.disconnect()
 
 
@@ -82,6 +122,7 @@ class ConsoleBot:
             if utils.clean(text, split=False) == "/quit":
                 break
             asyncio.run(self.main(text))
+        self.handler.saver.stop()
 
     async def main(self, text):
         """sends input to handler and prints output"""
@@ -132,6 +173,7 @@ class TestBot:
                 command = f"{prefix} {command}"
                 print(f"running command {command}")
                 asyncio.run(self.main(command))
+        self.handler.saver.stop()
 
     async def main(self, text):
         """sends inpput to handler and prints output"""
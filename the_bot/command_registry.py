@@ -0,0 +1,100 @@
+"""
+registry of all commands
+each part of the bot registers its commands when imported, the registry is then
+compiled into one dict used to find commands and to generate help texts
+"""
+import collections
+
+import utils
+
+Command = collections.namedtuple("Command", "name function category aliases usage")
+
+
+class Registry:
+    """registry of commands, grouped by what the message starts with (eg. eco, 2048)"""
+
+    def __init__(self):
+        self.groups = collections.defaultdict(list)
+        self.lookup = None
+        self.help_texts = None
+
+    def register(
+        self, group, name, function=None, *,
+        category="commands", aliases=(), usage=None
+    ):
+        """
+        registers a command
+
+        Args:
+            group - the group the command is in, "" for commands which start a message
+            name - the name of the command, None for help text only entries
+            function - the function run by the command
+            category - the category the command is listed under in help texts
+            aliases - other names for the command
+            usage - how the command is shown in help texts, defaults to name
+        """
+        self.groups[group].append(
+            Command(name, function, category, tuple(aliases), utils.default(usage, name))
+        )
+        self.lookup = None
+
+    def register_all(self, group, functions, *, category="commands", wrapper=None):
+        """registers a dict of command names to functions, optionally wrapping each function"""
+        for name, function in functions.items():
+            if wrapper:
+                function = wrapper(function)
+            self.register(group, name, function, category=category)
+
+    def compile(self):
+        """compiles every command and alias into one dict and builds the help texts"""
+        lookup = {}
+        help_texts = {}
+        for group, commands in self.groups.items():
+            categories = collections.OrderedDict()
+            for command in commands:
+                categories.setdefault(command.category, []).append(command.usage)
+                if command.name is None:
+                    continue
+                for name in (command.name, *command.aliases):
+                    if (group, name) in lookup:
+                        raise ValueError(f"command {name} is registered twice in {group}")
+                    lookup[(group, name)] = command
+            help_texts[group] = categories
+        self.lookup = lookup
+        self.help_texts = help_texts
+
+    def resolve(self, group, name):
+        """returns the command called name (or an alias) in group, or None"""
+        if self.lookup is None:
+            self.compile()
+        return self.lookup.get((group, name), None)
+
+    def names(self, group, aliases=True):
+        """returns the names of all commands in group"""
+        return [
+            name
+            for command in self.groups[group]
+            if command.name is not None
+            for name in (command.name, *(command.aliases if aliases else ()))
+        ]
+
+    def help_text(self, group, categories=None):
+        """returns the help text for a group, optionally only including some categories"""
+        if self.lookup is None:
+            self.compile()
+        return utils.join_items(
+            *[
+                (category, *usages)
+                for category, usages in self.help_texts[group].items()
+                if categories is None or category in categories
+            ],
+            description_mode="long"
+        )
+
+
+registry = Registry()
+register = registry.register
+register_all = registry.register_all
+resolve = registry.resolve
+names = registry.names
+help_text = registry.help_text
@@ -49,6 +49,68 @@ data_args.add_argument(
     "-f", "--save-file", dest="save_file", default="save_data",
     help="sets the file to save and load from",
 )
+data_args.add_argument(
+    "--storage", dest="storage", default="dbm", choices=["dbm", "sqlite"],
+    help="sets how data is stored",
+)
+data_args.add_argument(
+    "--max-loaded", dest="max_loaded", default=1000, type=int,
+    help="how many players/games of each game stay loaded in memory",
+)
+data_args.add_argument(
+    "--save-interval", dest="save_interval", default=1000, type=int,
+    help="milliseconds between saves",
+)
+data_args.add_argument(
+    "--save-commands", dest="save_commands", default=20, type=int,
+    help="saves after this many commands even if the save interval has not passed",
+)
+
+# incoming messages
+message_args = parser.add_argument_group("Messages")
+message_args.add_argument(
+    "--workers", dest="workers", default=4, type=int,
+    help="how many messages the hangouts bot handles at once",
+)
+message_args.add_argument(
+    "--queue-size", dest="queue_size", default=100, type=int,
+    help="how many messages can wait to be handled",
+)
+message_args.add_argument(
+    "--shed-policy", dest="shed_policy", default="drop_oldest", choices=["drop_oldest", "busy"],
+    help="what to do with new messages when the queue is full",
+)
+
+
+# outgoing messages
+send_args = parser.add_argument_group("Sending")
+send_args.add_argument(
+    "--send-window", dest="send_window", default=250, type=int,
+    help="replies to a conversation within this many milliseconds are sent as one message",
+)
+send_args.add_argument(
+    "--send-rate", dest="send_rate", default=2, type=float,
+    help="how many messages can be sent per second",
+)
+send_args.add_argument(
+    "--send-burst", dest="send_burst", default=5, type=int,
+    help="how many messages can be sent at once before --send-rate applies",
+)
+send_args.add_argument(
+    "--send-retries", dest="send_retries", default=3, type=int,
+    help="how many times to retry sending a message",
+)
+
+# games
+game_args = parser.add_argument_group("Games")
+game_args.add_argument(
+    "--hint-time", dest="hint_time", default=500, type=int,
+    help="milliseconds the 2048 solver can search for each hint or autoplay command",
+)
+game_args.add_argument(
+    "--solver-processes", dest="solver_processes", default=1, type=int,
+    help="how many processes run 2048 solver searches, 0 runs them in the bot's process",
+)
 
 
 def parse_arguments():
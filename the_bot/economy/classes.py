@@ -4,6 +4,8 @@ classes for economy game
 import utils
 import math
 import random
+import bisect
+import time
 
 
 class Item:
@@ -31,11 +33,58 @@ class Item:
         ]
 
 
+class BalanceIndex:
+    """
+    players ordered by lifetime balance, so finding a rank is a binary search
+    entries are (-lifetime balance, str(id), id) so the richest and then lowest ids are first
+    ids are compared as strings, since saves can have both int and str ids
+    """
+
+    def __init__(self, balances=()):
+        # id to lifetime balance
+        self.balances = dict(balances)
+        self.entries = sorted(
+            (-balance, str(id_), id_) for id_, balance in self.balances.items()
+        )
+
+    def __len__(self):
+        return len(self.entries)
+
+    def update(self, id_, balance):
+        """moves a player to their new lifetime balance"""
+        old_balance = self.balances.get(id_, None)
+        if old_balance == balance:
+            return
+        if old_balance is not None:
+            del self.entries[bisect.bisect_left(self.entries, (-old_balance, str(id_)))]
+        bisect.insort(self.entries, (-balance, str(id_), id_))
+        self.balances[id_] = balance
+
+    def rank(self, id_):
+        """returns the rank of a player, starting at 0"""
+        return bisect.bisect_left(self.entries, (-self.balances[id_], str(id_)))
+
+    def page(self, page, page_size):
+        """returns (rank, id, lifetime balance) of each player on a page, starting at page 1"""
+        start = (page - 1) * page_size
+        return [
+            (rank, id_, -negative_balance)
+            for rank, (negative_balance, _, id_) in enumerate(
+                self.entries[start:start + page_size], start
+            )
+        ]
+
+
 class EconomyPlayer:
     """class for players in economy"""
 
     PRESTIGE_CONVERSION = 100000
     PRESTIGE_UPGRADE_BASE = 2000
+    # claim gives one average mine every MINING_SECONDS, for at most MAX_MINING_SECONDS
+    MINING_SECONDS = 60
+    MAX_MINING_SECONDS = 24 * 60 * 60
+    # how many of the player's latest transactions are kept for history
+    HISTORY_LENGTH = 20
 
     def __init__(self, id_, name, manager):
         self.id_ = id_
@@ -47,13 +96,63 @@ class EconomyPlayer:
         self.confirmed_prestige = False
         self.confirmed_upgrade = False
         self.prestige_upgrade = 0
+        self.last_claim = time.time()
+        # id of the last ledger transaction applied to the player
+        self.ledger_id = -1
+        # where the player's latest transactions are in the ledger
+        self.ledger_offsets = []
         self.manager = manager
 
+    def __getstate__(self):
+        # the manager is set again when loading
+        state = self.__dict__.copy()
+        del state["manager"]
+        return state
+
+    def __setstate__(self, state):
+        # players saved before claim start mining when they are loaded
+        state.setdefault("last_claim", time.time())
+        state.setdefault("ledger_id", -1)
+        state.setdefault("ledger_offsets", [])
+        self.__dict__.update(state)
+
+    def get_id(self):
+        return self.id_
+
     def change_balance(self, money):
         """increases money"""
         self.balance += money
         if money > 0:
             self.lifetime_balance += money
+            self.manager.update_rank(self)
+
+    def apply_transaction(self, transaction):
+        """changes the player by a ledger transaction, unless it has already been applied"""
+        if transaction["id"] <= self.ledger_id:
+            return
+        amount = transaction["changes"][str(self.id_)]
+        if transaction["type"] == "opening":
+            self.balance = amount
+            self.lifetime_balance = transaction["lifetime"][str(self.id_)]
+            self.manager.update_rank(self)
+        else:
+            self.change_balance(amount)
+
+        if transaction["type"] == "buy":
+            item_type, modifier = transaction["item"]
+            self.items[item_type] = modifier
+        elif transaction["type"] == "prestige":
+            self.lifetime_balance = 0
+            self.items = {"pick": "copper"}
+            self.prestige += transaction["prestige"]
+            self.manager.update_rank(self)
+        elif transaction["type"] == "prestige_upgrade":
+            self.prestige += transaction["prestige"]
+            self.prestige_upgrade += 1
+
+        self.ledger_id = transaction["id"]
+        self.ledger_offsets.append(transaction["offset"])
+        del self.ledger_offsets[:-EconomyPlayer.HISTORY_LENGTH]
 
     def balance(self):
         """returns balance"""
@@ -67,10 +166,32 @@ class EconomyPlayer:
         mined_amount += math.ceil(mined_amount * self.prestige / 100)
         mined_amount *= 2 ** self.prestige_upgrade
 
-        self.change_balance(mined_amount)
+        self.manager.transact("mine", {self: mined_amount})
 
         return f"{self.name}, you mined {mined_amount} Saber Dollars!"
 
+    def mining_rate(self):
+        """average saber dollars from one mine, with the prestige bonuses"""
+        low, high = self.get_item("pick").mining_range
+        return (low + high) / 2 * (1 + self.prestige / 100) * 2 ** self.prestige_upgrade
+
+    def collect_mining(self):
+        """adds the money mined since the last claim and returns it"""
+        now = time.time()
+        seconds = utils.clamp(now - self.last_claim, 0, EconomyPlayer.MAX_MINING_SECONDS)
+        rate = self.mining_rate() / EconomyPlayer.MINING_SECONDS
+        mined_amount = math.floor(seconds * rate)
+        # time toward the next saber dollar is kept for the next claim
+        self.last_claim = now - (seconds - mined_amount / rate)
+        if mined_amount:
+            self.manager.transact("claim", {self: mined_amount})
+        return mined_amount
+
+    def claim(self, commands):
+        """claims the saber dollars mined since the last claim"""
+        mined_amount = self.collect_mining()
+        return f"{self.name}, you mined {mined_amount} Saber Dollars since your last claim!"
+
     def buy(self, commands):
         """buys a item"""
         modifier = next(commands)
@@ -79,15 +200,15 @@ class EconomyPlayer:
         if type(item) == str:
             return item
 
-        if self.balance < item.price:
-            return "You don't have enough money for that!"
-        elif item.modifer == self.items[item_type]:
+        # mining before the purchase is claimed with the old pick, and can pay for it
+        self.collect_mining()
+        if item.modifer == self.items[item_type]:
             return "You already have that item!"
         elif self.get_item(item_type).level > item.level:
             return "You already have a item better than that!"
+        elif not self.manager.transact("buy", {self: -item.price}, item=[item_type, modifier]):
+            return "You don't have enough money for that!"
         else:
-            self.items[item_type] = modifier
-            self.change_balance(- item.price)
             return "Purchase successful!"
 
     def give(self, commands):
@@ -111,11 +232,9 @@ class EconomyPlayer:
         # check money is valid
         if money < 0:
             return "You can't give negative money!"
-        elif self.balance < money:
-            return "You don't have enough money to do that!"
 
-        self.change_balance(-money)
-        receiving_player.change_balance(money)
+        if not self.manager.transact("give", {self: -money, receiving_player: money}):
+            return "You don't have enough money to do that!"
 
         return utils.join_items(
             f"Successfully given {money} Saber Dollars to {receiving_player.name}.",
@@ -128,12 +247,10 @@ class EconomyPlayer:
         earned_prestige = math.trunc(
             self.lifetime_balance / EconomyPlayer.PRESTIGE_CONVERSION)
         if self.confirmed_prestige:
-            self.balance = 0
-            self.lifetime_balance = 0
+            self.manager.transact("prestige", {self: -self.balance}, prestige=earned_prestige)
             self.confirmed_prestige = False
             self.confirmed_upgrade = False
-            self.items = {"pick": "copper"}
-            self.prestige += earned_prestige
+            self.last_claim = time.time()
             output_text = "Successfully prestiged"
         else:
             self.confirmed_prestige = True
@@ -155,8 +272,9 @@ class EconomyPlayer:
             if self.prestige < prestige_upgrade_cost:
                 output_text += f"That costs {prestige_upgrade_cost} prestige, which you don't have!"
             else:
-                self.prestige_upgrade += 1
-                self.prestige -= prestige_upgrade_cost
+                self.collect_mining()
+                # costs no money, but goes through the ledger so it is replayed like prestige
+                self.manager.transact("prestige_upgrade", {self: 0}, prestige=-prestige_upgrade_cost)
                 output_text += "Successfully upgraded prestige!"
         else:
             output_text += utils.join_items(
@@ -184,6 +302,7 @@ class EconomyPlayer:
 
     commands = {
         "mine": mine,
+        "claim": claim,
         "prestige": prestige_action,
         "prestige_upgrade": prestige_upgrade_action,
         "give": give,
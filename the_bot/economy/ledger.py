@@ -0,0 +1,156 @@
+"""
+append-only ledger of every change to economy balances
+each transaction is one line of json, synced to disk in batches
+"""
+import atexit
+import collections
+import json
+import os
+import threading
+import time
+
+
+class Ledger:
+    """
+    file of transactions, from which every player's balance can be rebuilt
+    player ids are kept as the strings json keys are, so ids that are strings and ids
+    that are ints are both found with str(id_)
+
+    only the transactions after the checkpoint (see Ledger.checkpoint) are read when loading
+    """
+    # synced once this many transactions are waiting, or sync_interval seconds have passed
+    max_unsynced = 20
+    sync_interval = 1
+
+    def __init__(self, file_name, checkpoint=None):
+        self.file_name = file_name
+        self.lock = threading.Lock()
+        checkpoint = checkpoint or {"offset": 0, "next_id": 0, "totals": {}}
+        # transaction type to the total change in balances
+        self.totals = collections.Counter(checkpoint["totals"])
+        self.next_id = checkpoint["next_id"]
+        # transactions after the checkpoint, which may not be in the saved players yet
+        self.tail = []
+        self.unsynced = 0
+        self.last_sync = time.monotonic()
+
+        self.file = open(file_name, "a+b")
+        offset = checkpoint["offset"]
+        if offset > self.file.seek(0, os.SEEK_END):
+            # the file is older than the checkpoint, so all of it is read again
+            offset = 0
+            self.totals.clear()
+        self.file.seek(offset)
+        for line in self.file:
+            if not line.endswith(b"\n"):
+                # the bot stopped while writing the last transaction, so it never happened
+                self.file.truncate(offset)
+                break
+            transaction = json.loads(line)
+            transaction["offset"] = offset
+            self.index(transaction)
+            self.tail.append(transaction)
+            offset += len(line)
+        atexit.register(self.close)
+
+    def __len__(self):
+        return self.next_id
+
+    def index(self, transaction):
+        """adds a transaction to the totals"""
+        for amount in transaction["changes"].values():
+            self.totals[transaction["type"]] += amount
+        self.next_id = max(self.next_id, transaction["id"] + 1)
+
+    def append(self, type_, changes, **details):
+        """
+        writes a transaction and returns it
+
+        Args:
+            type_ - what caused the transaction (eg. give, buy, mine)
+            changes - dict of player id to the change in their balance
+            **details - anything else needed to replay the transaction (eg. the item bought)
+        """
+        with self.lock:
+            transaction = {
+                "id": self.next_id, "time": time.time(), "type": type_,
+                "changes": {str(id_): amount for id_, amount in changes.items()},
+                **details
+            }
+            offset = self.file.seek(0, os.SEEK_END)
+            # written to the os right away so only a crash of the whole machine can lose it
+            self.file.write(json.dumps(transaction).encode() + b"\n")
+            self.file.flush()
+            transaction["offset"] = offset
+            self.index(transaction)
+            self.unsynced += 1
+        return transaction
+
+    def commit(self):
+        """syncs once enough transactions are waiting or sync_interval has passed"""
+        if (
+            self.unsynced >= self.max_unsynced or
+            time.monotonic() - self.last_sync >= self.sync_interval
+        ):
+            self.sync()
+
+    def sync(self):
+        """makes sure written transactions are on the disk, can be called from another thread"""
+        with self.lock:
+            if self.file.closed or not self.unsynced:
+                self.last_sync = time.monotonic()
+                return
+            self.unsynced = 0
+            self.last_sync = time.monotonic()
+            file_number = os.dup(self.file.fileno())
+        # synced without the lock, so appending is not blocked by the disk
+        try:
+            os.fsync(file_number)
+        finally:
+            os.close(file_number)
+
+    def checkpoint(self):
+        """returns where the ledger is up to, to load it from there next time"""
+        with self.lock:
+            return {
+                "offset": self.file.seek(0, os.SEEK_END),
+                "next_id": self.next_id,
+                "totals": dict(self.totals),
+            }
+
+    def read(self, offset):
+        """returns the transaction written at offset"""
+        with self.lock:
+            self.file.seek(offset)
+            return json.loads(self.file.readline())
+
+    def transactions(self):
+        """generates every transaction in order"""
+        with self.lock:
+            self.file.seek(0)
+            lines = self.file.readlines()
+        for line in lines:
+            yield json.loads(line)
+
+    def balances(self):
+        """replays every transaction, returns str(player id) to (balance, lifetime balance)"""
+        balances = collections.defaultdict(lambda: [0, 0])
+        for transaction in self.transactions():
+            for id_, amount in transaction["changes"].items():
+                balance = balances[id_]
+                if transaction["type"] == "opening":
+                    balance[:] = [amount, transaction["lifetime"][id_]]
+                    continue
+                balance[0] += amount
+                if amount > 0:
+                    balance[1] += amount
+                if transaction["type"] == "prestige":
+                    balance[:] = [0, 0]
+        return {id_: tuple(balance) for id_, balance in balances.items()}
+
+    def close(self):
+        """syncs and closes the file"""
+        self.sync()
+        with self.lock:
+            self.file.close()
+        atexit.unregister(self.close)
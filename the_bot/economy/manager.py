@@ -2,15 +2,22 @@
 manager for economy
 """
 import economy.classes as classes
+import economy.ledger as ledger
+import command_registry
 import utils
 import game_utils
+import math
+import threading
+import datetime
 
 
 class EconomyManager:
     """manager for economy"""
+    LEADERBOARD_PAGE_SIZE = 5
 
     def __init__(self):
         self.players = {}
+        self.transaction_lock = threading.Lock()
         self.items = {
             "pick": classes.Item.generate_items(
                 "pick", (
@@ -23,6 +30,12 @@ class EconomyManager:
                 )
             )
         }
+        # (type, modifier) to the item, items of each type are already in order of level
+        self.item_index = {
+            (type_, item.modifer): item for type_, items in self.items.items() for item in items
+        }
+        # level of the player's item of each type to the text of the shop
+        self.shop_texts = {}
         self.load_game()
         self.save_game()
 
@@ -31,88 +44,147 @@ class EconomyManager:
             return "Invalid item name"
         elif type_ not in self.items:
             return "That item doesn't exist!"
-        items = self.items[type_]
-        for item in items:
-            if item.modifer == modifier:
-                return item
-
-        return "That item doesn't exist!"
+        return self.item_index.get((type_, modifier), "That item doesn't exist!")
 
     def run_game(self, player_id, commands):
         """runs the game"""
-        command = next(commands)
-        output_text = ""
-        if command == "help":
-            return self.help_text
-        if command == "register":
-            return self.register(player_id, commands)
+        command = command_registry.resolve("eco", next(commands))
+        if command is None:
+            return "Invalid command"
+        # account commands take the player id since the player may not be registered
+        if command.category == "account":
+            return command.function(self, player_id, commands)
         elif player_id not in self.players.keys():
             return "You are not registered! Use register"
 
         player = self.players[player_id]
-        if command not in ("prestige", "prestige_upgrade"):
+        self.players.mark(player_id)
+        if command.name not in ("prestige", "prestige_upgrade"):
             player.confirmed_prestige = False
             player.confirmed_upgrade = False
-        if command in self.commands:
-            function_ = self.commands[command]
-            output_text = function_(self, player, commands)
-        elif command in classes.EconomyPlayer.commands:
-            function_ = classes.EconomyPlayer.commands[command]
-            output_text = function_(player, commands)
-        else:
-            output_text = "Invalid command"
-
-        return output_text
+        return command.function(self, player, commands)
 
     def get_player(self, name):
         if not name:
             return "You must specify a player or ID"
-        for player in self.players.values():
-            if name == player.name:
-                return player
+        player = self.player_index.get(name)
+        if player is not None:
+            return player
+        # hangouts ids are strings, ids from older saves may be ints
+        if name in self.players:
+            return self.players[name]
         if name.isdigit() and int(name) in self.players:
             return self.players[int(name)]
         return "Invalid player"
 
-    def leaderboard(self, playing_player, commands):
-        """returns leaderboard"""
-        player_balances = {
-            player: player.lifetime_balance for player in self.players.values()}
-        leaderboard_text = "Ranking by balance earned in this lifetime:\n"
+    def transact(self, type_, changes, **details):
+        """
+        changes the balances of several players at once, writing the change to the ledger first
+        nothing changes if any player would not have enough money
+
+        Args:
+            type_ - what caused the transaction (eg. give, buy, mine)
+            changes - dict of player to the change in their balance
+            **details - anything else needed to replay the transaction (eg. the item bought)
 
-        sorted_players = [
-            player for player in sorted(
-                list(player_balances.items()),
-                key=lambda x: x[1], reverse=True
+        Returns whether the transaction happened
+        """
+        with self.transaction_lock:
+            if any(player.balance + amount < 0 for player, amount in changes.items()):
+                return False
+            transaction = self.ledger.append(
+                type_, {player.id_: amount for player, amount in changes.items()}, **details
             )
+            for player in changes:
+                player.apply_transaction(transaction)
+                self.players.mark(player.id_)
+            return True
+
+    def replay_ledger(self):
+        """
+        applies the transactions after the last checkpoint to the players
+        the bot may have stopped before the players they changed were saved
+        """
+        if not self.ledger.tail:
+            return
+        ids = {str(id_): id_ for id_ in self.players.keys()}
+        for transaction in self.ledger.tail:
+            for id_ in transaction["changes"]:
+                # players who were never saved are not in the ledger's players either
+                if id_ in ids:
+                    self.players[ids[id_]].apply_transaction(transaction)
+                    self.players.mark(ids[id_])
+        self.ledger.tail = []
+
+    def history(self, player, commands):
+        """returns the player's latest transactions"""
+        number = next(commands)
+        number = utils.clamp(
+            int(number), 1, classes.EconomyPlayer.HISTORY_LENGTH
+        ) if number.isdigit() else 5
+        transactions = [
+            self.ledger.read(offset) for offset in reversed(player.ledger_offsets[-number:])
         ]
+        if not transactions:
+            return "You have no transactions yet"
+        return utils.join_items(*[
+            f"{transaction['type']}: {transaction['changes'][str(player.id_)]:+} Saber Dollars, " +
+            datetime.datetime.fromtimestamp(transaction["time"]).strftime("%Y-%m-%d %H:%M")
+            for transaction in transactions
+        ])
+
+    def audit(self, player, commands):
+        """returns the total change in balances from each type of transaction"""
+        return utils.join_items(
+            f"{len(self.ledger)} transactions",
+            *[
+                f"{type_}: {total:+} Saber Dollars"
+                for type_, total in sorted(self.ledger.totals.items())
+            ]
+        )
 
-        for rank in range(5):
-            player_balance = utils.get_item(sorted_players, (rank, ))
-            if player_balance:
-                player, balance = player_balance
-                leaderboard_text += f"{rank + 1}. {player.name}: {balance}\n"
+    def update_rank(self, player):
+        """keeps the leaderboard in step with a player's lifetime balance"""
+        if self.balances.get(player.id_, None) != player.lifetime_balance:
+            self.balances[player.id_] = player.lifetime_balance
+            self.ranks.update(player.id_, player.lifetime_balance)
 
-        playing_player_rank = sorted_players.index(
-            (playing_player, playing_player.lifetime_balance))
-        if playing_player_rank > 5:
+    def leaderboard(self, playing_player, commands):
+        """returns a page of the leaderboard"""
+        pages = max(math.ceil(len(self.ranks) / self.LEADERBOARD_PAGE_SIZE), 1)
+        page = next(commands)
+        page = utils.clamp(int(page), 1, pages) if page.isdigit() else 1
+        leaderboard_text = "Ranking by balance earned in this lifetime:\n"
+
+        page_ids = []
+        for rank, id_, balance in self.ranks.page(page, self.LEADERBOARD_PAGE_SIZE):
+            page_ids.append(id_)
+            leaderboard_text += f"{rank + 1}. {self.players[id_].name}: {balance}\n"
+
+        if playing_player.id_ not in page_ids:
             leaderboard_text += (
-                f"\n{playing_player_rank + 1}."
-                f"{playing_player.name}(you): {playing_player.lifetime_balance}"
+                f"\n{self.ranks.rank(playing_player.id_) + 1}. "
+                f"{playing_player.name}(you): {playing_player.lifetime_balance}\n"
             )
 
-        return leaderboard_text
+        return leaderboard_text + f"{page}/{pages}"
 
     def shop(self, player, commands):
-        """returns shop"""
+        """returns shop, only made once for each combination of items players have"""
+        levels = tuple(player.get_item(type_name).level for type_name in self.items)
+        if levels not in self.shop_texts:
+            self.shop_texts[levels] = self.make_shop(levels)
+        return self.shop_texts[levels]
+
+    def make_shop(self, levels):
+        """returns the shop for a player with items of levels"""
         shop_list = []
-        for type_name, items in self.items.items():
+        for (type_name, items), level in zip(self.items.items(), levels):
             items_text = [type_name]
-            player_item = player.get_item(type_name)
-            if items.index(player_item) == len(items) - 1:
+            if level == len(items) - 1:
                 items_text = f"You already have the highest level {type_name}"
             else:
-                for item in items[items.index(player_item) + 1:]:
+                for item in items[level + 1:]:
                     items_text.append(utils.description(
                         item.name().title(),
                         f"{item.price} saber dollars"
@@ -124,11 +196,55 @@ class EconomyManager:
 
     def save_game(self):
         """saves the game"""
-        utils.save(economy_players=self.players)
+        # taken before the players are saved, so every transaction it covers is in them
+        checkpoint = self.ledger.checkpoint()
+        if not utils.saver:
+            # records are written right away, the saver syncs the ledger when there is one
+            self.ledger.commit()
+        self.players.save()
+        self.balances.save()
+        self.player_index.save()
+        # queued after the players, so the checkpoint is never saved before the players it covers
+        if self.checkpoints.get("ledger", None) != checkpoint:
+            self.checkpoints["ledger"] = checkpoint
+        self.checkpoints.save()
 
     def load_game(self):
         """loads the game"""
-        self.players = utils.load("economy_players")
+        self.players = utils.LazyRecords("economy_players", on_load=self.attach_player)
+        # lifetime balances are saved by themselves so the leaderboard does not load every player
+        self.balances = utils.Records.load("economy_balances")
+        if not self.balances:
+            for player in self.players.values():
+                self.balances[player.id_] = player.lifetime_balance
+        self.ranks = classes.BalanceIndex(self.balances)
+        self.player_index = game_utils.PlayerIndex("economy_names", self.players)
+        # the ledger is what balances are saved in, players are updated from it when loading
+        self.checkpoints = utils.Records.load("economy_checkpoint")
+        self.ledger = ledger.Ledger(
+            utils.data_file("economy_ledger"), self.checkpoints.get("ledger", None)
+        )
+        # synced from the saver thread, so the disk never blocks the bot
+        utils.file_syncs["economy_ledger"] = self.ledger.sync
+        self.replay_ledger()
+        # saves from before the ledger start it with every player's balance
+        if not len(self.ledger):
+            players = [
+                player for player in self.players.values()
+                if player.balance or player.lifetime_balance
+            ]
+            if players:
+                transaction = self.ledger.append(
+                    "opening", {player.id_: player.balance for player in players},
+                    lifetime={str(player.id_): player.lifetime_balance for player in players}
+                )
+                for player in players:
+                    player.apply_transaction(transaction)
+                    self.players.mark(player.id_)
+
+    def attach_player(self, player_id, player):
+        """gives a loaded player a reference to the manager"""
+        player.manager = self
 
     def register(self, player_id, commands):
         """registers a player"""
@@ -139,14 +255,34 @@ class EconomyManager:
             return "you must provide a name"
         self.players[player_id] = classes.EconomyPlayer(
             id_=player_id, name=name, manager=self)
+        self.update_rank(self.players[player_id])
+        self.player_index.set_name(player_id, name)
         return "Successfully registered!"
 
+    def help_(self, player_id, commands):
+        """returns help text"""
+        return command_registry.help_text("eco")
+
     commands = {
-        "leaderboard": leaderboard,
         "shop": shop,
         "profile": game_utils.profile,
+        "audit": audit,
     }
-    help_text = utils.join_items(
-        ("commands", *classes.EconomyPlayer.commands, *commands, "help"),
-        description_mode="long"
-    )
+
+
+def player_command(function):
+    """lets player commands be called like manager commands"""
+    return lambda manager, player, commands: function(player, commands)
+
+
+command_registry.register_all(
+    "eco", classes.EconomyPlayer.commands, wrapper=player_command)
+command_registry.register(
+    "eco", "leaderboard", EconomyManager.leaderboard, usage="leaderboard {page}")
+command_registry.register(
+    "eco", "history", EconomyManager.history, usage="history {number}")
+command_registry.register_all("eco", EconomyManager.commands)
+command_registry.register_all(
+    "eco", {"register": EconomyManager.register, "help": EconomyManager.help_},
+    category="account"
+)
@@ -0,0 +1,120 @@
+from pathlib import Path
+import tempfile
+import unittest
+
+import saver
+import storage
+import utils
+from economy import ledger, manager
+
+# hangouts ids are strings of digits
+PLAYER_ID = "117790385966808489693"
+
+
+class TestLedger(unittest.TestCase):
+
+    def setUp(self):
+        self.save_dir = tempfile.TemporaryDirectory()
+        self.file_name = str(Path(self.save_dir.name) / "economy_ledger")
+
+    def tearDown(self):
+        self.save_dir.cleanup()
+
+    def test_string_ids(self):
+        eco_ledger = ledger.Ledger(self.file_name)
+        eco_ledger.append("mine", {PLAYER_ID: 10})
+        eco_ledger.append("give", {PLAYER_ID: -4, 5: 4})
+        eco_ledger.close()
+
+        eco_ledger = ledger.Ledger(self.file_name)
+        self.assertEqual(eco_ledger.balances(), {PLAYER_ID: (6, 10), "5": (4, 4)})
+        self.assertEqual([transaction["id"] for transaction in eco_ledger.tail], [0, 1])
+        eco_ledger.close()
+
+    def test_checkpoint(self):
+        eco_ledger = ledger.Ledger(self.file_name)
+        eco_ledger.append("mine", {PLAYER_ID: 10})
+        checkpoint = eco_ledger.checkpoint()
+        eco_ledger.append("mine", {PLAYER_ID: 3})
+        eco_ledger.close()
+
+        # only the transaction after the checkpoint is read
+        eco_ledger = ledger.Ledger(self.file_name, checkpoint)
+        self.assertEqual([transaction["id"] for transaction in eco_ledger.tail], [1])
+        self.assertEqual(eco_ledger.totals["mine"], 13)
+        self.assertEqual(len(eco_ledger), 2)
+        self.assertEqual(eco_ledger.read(eco_ledger.tail[0]["offset"])["changes"], {PLAYER_ID: 3})
+        eco_ledger.close()
+
+    def test_saver_syncs(self):
+        eco_ledger = ledger.Ledger(self.file_name)
+        utils.file_syncs["test_ledger"] = eco_ledger.sync
+        try:
+            eco_ledger.append("mine", {PLAYER_ID: 10})
+            self.assertEqual(eco_ledger.unsynced, 1)
+            saver.Saver().flush()
+            self.assertEqual(eco_ledger.unsynced, 0)
+        finally:
+            del utils.file_syncs["test_ledger"]
+            eco_ledger.close()
+
+    def test_partial_transaction(self):
+        eco_ledger = ledger.Ledger(self.file_name)
+        eco_ledger.append("mine", {PLAYER_ID: 10})
+        eco_ledger.close()
+        with open(self.file_name, "ab") as file:
+            file.write(b'{"id": 1, "type": "mi')
+
+        eco_ledger = ledger.Ledger(self.file_name)
+        self.assertEqual(len(eco_ledger), 1)
+        eco_ledger.append("mine", {PLAYER_ID: 3})
+        self.assertEqual(eco_ledger.balances(), {PLAYER_ID: (13, 13)})
+        eco_ledger.close()
+
+
+class TestCrashRecovery(unittest.TestCase):
+
+    def setUp(self):
+        self.save_dir = tempfile.TemporaryDirectory()
+        self.old_globals = (utils.storage_backend, utils.save_file, dict(utils.file_syncs))
+        # set without utils.open_storage, which registers the backend to close at exit
+        utils.save_file = str(Path(self.save_dir.name) / "save_data")
+        utils.storage_backend = storage.DbmStorage(utils.save_file, utils.data_tables["eco"])
+
+    def tearDown(self):
+        utils.storage_backend.close()
+        utils.storage_backend, utils.save_file, file_syncs = self.old_globals
+        utils.file_syncs.clear()
+        utils.file_syncs.update(file_syncs)
+        self.save_dir.cleanup()
+
+    def test_replay_after_crash(self):
+        eco_manager = manager.EconomyManager()
+        eco_manager.register(PLAYER_ID, utils.CommandParser("miner"))
+        player = eco_manager.players[PLAYER_ID]
+        player.prestige = 2500
+        eco_manager.save_game()
+        eco_manager.transact("mine", {player: 10})
+        eco_manager.transact("buy", {player: -5}, item=["pick", "tin"])
+        eco_manager.transact("prestige_upgrade", {player: 0}, prestige=-2000)
+        # the bot stops before the player is saved again
+        eco_manager.ledger.close()
+
+        eco_manager = manager.EconomyManager()
+        player = eco_manager.players[PLAYER_ID]
+        self.assertEqual(player.balance, 5)
+        self.assertEqual(player.lifetime_balance, 10)
+        self.assertEqual(player.items["pick"], "tin")
+        self.assertEqual((player.prestige, player.prestige_upgrade), (500, 1))
+        self.assertEqual(len(player.ledger_offsets), 3)
+
+        # replaying again once the player is saved changes nothing
+        eco_manager.ledger.close()
+        eco_manager = manager.EconomyManager()
+        self.assertEqual(eco_manager.players[PLAYER_ID].balance, 5)
+        self.assertFalse(eco_manager.ledger.tail)
+        eco_manager.ledger.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
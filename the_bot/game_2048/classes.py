@@ -5,7 +5,14 @@ Made by Chendi
 import random
 import utils
 import enum
+import array
+import bisect
 import collections
+import datetime
+import importlib.util
+
+import command_registry
+from game_2048 import solver
 
 # because typos
 CURRENT_GAME = "current game"
@@ -21,7 +28,10 @@ class Cell:
 
 
 class Board:
-    """represents a board for 2048"""
+    """
+    represents a board for 2048 as a list of cells
+    games are played on BitBoards, this is kept to load games saved before them
+    """
 
     def __init__(self, mode):
         self.size = mode.size
@@ -29,7 +39,8 @@ class Board:
         self.cells = [Cell() for _ in range(self.number_of_cells)]
 
     def move_blocks(self, x, positive, game):
-        """Moves all blocks in the board"""
+        """Moves all blocks in the board, returns whether any block moved"""
+        old_values = self.values
         # generates indexes of cell for each row/column
         for i in range(self.size):
             if x:
@@ -39,6 +50,7 @@ class Board:
             if positive:
                 indexes.reverse()
             self.move_line(indexes, game)
+        return old_values != self.values
 
     def move_line(self, line, game):
         for j in line:
@@ -68,6 +80,11 @@ class Board:
                     else:
                         break
 
+    @property
+    def values(self):
+        """the value of every cell"""
+        return [cell.value for cell in self.cells]
+
     def check_can_move(self):
         """Checks if the player can move"""
         if self.number_of_empty_cells():
@@ -85,6 +102,10 @@ class Board:
                         return True
         return False
 
+    def largest_value(self):
+        """returns the value of the largest block"""
+        return max(self.values)
+
     def number_of_empty_cells(self):
         """Checks if the board is full and return number of empty spaces"""
         empty = 0
@@ -93,14 +114,14 @@ class Board:
                 empty += 1
         return empty
 
-    def make_new_block(self, mode):
-        """Makes random new block"""
+    def make_new_block(self, mode, rng=random):
+        """Makes random new block, using rng (the game's random number generator)"""
         if not self.number_of_empty_cells():
             return
         empty_blocks = [cell for cell in self.cells if cell.value == 0]
-        empty_cell = random.choice(empty_blocks)
+        empty_cell = rng.choice(empty_blocks)
         value = 1
-        if random.randint(0, 10) == 10:
+        if rng.randint(0, 10) == 10:
             value = 2
         empty_cell.value = value
 
@@ -109,17 +130,241 @@ class Board:
         text = ""
         max_length = 0
         for cell in self.cells:
-            cell.length = len(str(game.mode().values[cell.value]))
+            cell.length = len(str(game.block_values()[cell.value]))
         max_length = max(self.cells, key=lambda cell: cell.value).length
         for row in range(game.mode().size):
             for column in range(game.mode().size):
                 cell = game.board.cells[row * game.mode().size + column]
                 spaces = (max_length - cell.length + 1) * " "
-                text += spaces * 2 + str(game.mode().values[cell.value])
+                text += spaces * 2 + str(game.block_values()[cell.value])
             text += "\n"
         return text
 
 
+class BaseBoard:
+    """
+    base for boards which store the exponent of each block
+    subclasses must have values and set_values
+    """
+
+    def __init__(self, mode):
+        self.size = mode.size
+        self.number_of_cells = self.size ** 2
+        # row index to ((mode name, max length, row values), text of the row)
+        self.row_texts = {}
+
+    def __getstate__(self):
+        # the text of rows is not saved since it is quick to make again
+        state = self.__dict__.copy()
+        state.pop("row_texts", None)
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.row_texts = {}
+
+    def largest_value(self):
+        """returns the value of the largest block"""
+        return max(self.values)
+
+    def draw_board(self, game):
+        """returns text representation of the board, only drawing rows which changed"""
+        block_values = game.block_values()
+        values = self.values
+        max_length = len(str(block_values[max(values)]))
+        rows = []
+        for row, start in enumerate(range(0, self.number_of_cells, self.size)):
+            key = (game.mode_name, max_length, values[start:start + self.size])
+            cached = self.row_texts.get(row)
+            if cached is None or cached[0] != key:
+                cells = []
+                for value in key[2]:
+                    text = str(block_values[value])
+                    cells.append((max_length - len(text) + 1) * 2 * " " + text)
+                cached = self.row_texts[row] = (key, "".join(cells) + "\n")
+            rows.append(cached[1])
+        return "".join(rows)
+
+
+class BitBoard(BaseBoard):
+    """
+    represents a board for 2048 as one int, with bits bits for each cell
+    cells hold the exponent of the block (index in GameMode.values), 0 for empty cells
+
+    blocks are moved one row or column at a time, each line is shifted to the first
+    row or column and the result of moving it is looked up in line_moves
+    the number of empty cells and the largest block are kept up to date as blocks move,
+    so checking for moves and wins does not decode the board
+    """
+    # shifts of the cells in a line to dicts of lines to
+    # (moved line, values of merged blocks, number of empty cells, largest block)
+    # filled as lines are seen since every possible line would not fit in memory
+    line_moves = {}
+    max_line_moves = 2 ** 16
+    # (size, bits, x, positive) to the lines of a board
+    line_shifts = {}
+
+    def __init__(self, mode):
+        super().__init__(mode)
+        # enough bits to hold the largest value in any GameMode
+        self.bits = (self.number_of_cells + 2).bit_length()
+        self.mask = (1 << self.bits) - 1
+        # the lowest bit of every cell
+        self.low_bits = sum(1 << index * self.bits for index in range(self.number_of_cells))
+        self.tiles = 0
+        self.empty = self.number_of_cells
+        self.largest = 0
+
+    def __setstate__(self, state):
+        super().__setstate__(state)
+        # boards saved before empty and largest were kept
+        self.count_tiles()
+
+    @property
+    def values(self):
+        """the value of every cell"""
+        tiles = self.tiles
+        mask = self.mask
+        return [
+            tiles >> shift & mask
+            for shift in range(0, self.number_of_cells * self.bits, self.bits)
+        ]
+
+    def set_values(self, values):
+        """sets the value of every cell"""
+        self.tiles = 0
+        for index, value in enumerate(values):
+            self.tiles |= value << index * self.bits
+        self.count_tiles()
+
+    def count_tiles(self):
+        """sets empty and largest from the rows of the board"""
+        self.empty = 0
+        self.largest = 0
+        for shift, mask, shifts in self.lines(True, False):
+            _, _, empty, largest = self.move_line(self.tiles >> shift & mask, shifts)
+            self.empty += empty
+            self.largest = max(self.largest, largest)
+
+    def largest_value(self):
+        """returns the value of the largest block"""
+        return self.largest
+
+    def empty_cells(self, tiles=None):
+        """returns an int with the lowest bit of each empty cell (of tiles or the board) set"""
+        if tiles is None:
+            tiles = self.tiles
+        occupied = tiles
+        for shift in range(1, self.bits):
+            occupied |= tiles >> shift
+        return ~occupied & self.low_bits
+
+    def lines(self, x, positive):
+        """
+        returns the lines for a direction, shared by every board of the same size
+        a line is (shift, mask, shifts) where shift and mask select the cells of the line,
+        and shifts are the shifts of its cells after shifting by shift, starting from the edge
+        """
+        key = (self.size, self.bits, x, positive)
+        if key not in self.line_shifts:
+            if x:
+                # rows, the cells of a line are next to each other
+                shifts = [index * self.bits for index in range(self.size)]
+                line_shifts = [index * self.size * self.bits for index in range(self.size)]
+            else:
+                # columns, the cells of a line are a row apart
+                shifts = [index * self.size * self.bits for index in range(self.size)]
+                line_shifts = [index * self.bits for index in range(self.size)]
+            if positive:
+                shifts.reverse()
+            mask = sum(self.mask << shift for shift in shifts)
+            self.line_shifts[key] = [(shift, mask, tuple(shifts)) for shift in line_shifts]
+        return self.line_shifts[key]
+
+    def move_line(self, line, shifts):
+        """returns line moved toward the cell at shifts[0] and the values of the merged blocks"""
+        moves = self.line_moves.setdefault(shifts, {})
+        if line in moves:
+            return moves[line]
+
+        blocks = [line >> shift & self.mask for shift in shifts]
+        blocks = [value for value in blocks if value]
+        empty = len(shifts) - len(blocks)
+        largest = max(blocks, default=0)
+        moved_line = 0
+        merged = []
+        index = 0
+        for shift in shifts:
+            if index >= len(blocks):
+                break
+            value = blocks[index]
+            # blocks only merge once per move
+            if index + 1 < len(blocks) and blocks[index + 1] == value:
+                value += 1
+                merged.append(value)
+                index += 1
+            moved_line |= value << shift
+            index += 1
+
+        if len(moves) >= self.max_line_moves:
+            moves.clear()
+        moves[line] = (moved_line, tuple(merged), empty, largest)
+        return moves[line]
+
+    def move_blocks(self, x, positive, game):
+        """Moves all blocks in the board, returns whether any block moved"""
+        tiles = self.tiles
+        for shift, mask, shifts in self.lines(x, positive):
+            line = tiles >> shift & mask
+            moved_line, merged, _, _ = self.move_line(line, shifts)
+            if moved_line == line:
+                continue
+            for value in merged:
+                game.score += game.mode().increase_score(value)
+                # each merge empties a cell
+                self.empty += 1
+                if value > self.largest:
+                    self.largest = value
+            tiles = tiles & ~(mask << shift) | moved_line << shift
+        moved = tiles != self.tiles
+        self.tiles = tiles
+        return moved
+
+    def check_can_move(self):
+        """Checks if the player can move"""
+        if self.empty:
+            return True
+        # a full board can only move if two neighbors can merge
+        tiles = self.tiles
+        for x in (True, False):
+            for shift, mask, shifts in self.lines(x, False):
+                if self.move_line(tiles >> shift & mask, shifts)[1]:
+                    return True
+        return False
+
+    def number_of_empty_cells(self):
+        """Checks if the board is full and return number of empty spaces"""
+        return self.empty
+
+    def make_new_block(self, mode, rng=random):
+        """Makes random new block, using rng (the game's random number generator)"""
+        empty_cells = self.empty_cells()
+        if not empty_cells:
+            return
+        shifts = []
+        while empty_cells:
+            lowest_bit = empty_cells & -empty_cells
+            shifts.append(lowest_bit.bit_length() - 1)
+            empty_cells ^= lowest_bit
+        shift = rng.choice(shifts)
+        value = 1
+        if rng.randint(0, 10) == 10:
+            value = 2
+        self.tiles |= value << shift
+        self.empty -= 1
+        self.largest = max(self.largest, value)
+
+
 @enum.unique
 class GameIncreaseModes(enum.Enum):
     TIMES_2 = enum.auto()
@@ -129,17 +374,21 @@ class GameIncreaseModes(enum.Enum):
 
 class GameMode:
     """class to represent different gamemodes"""
-    shuffled = [i for i in range(100)]
+    shuffled = [i for i in range(1, 100)]
     random.shuffle(shuffled)
+    # seeds to the values of RANDOM games, made the first time a game with the seed is drawn
+    seeded_values = {}
+    max_seeded_values = 1024
+    # the chance of each new block made by make_new_block
+    new_block_chances = {1: 10 / 11, 2: 1 / 11}
 
     def __init__(
         self, start_value=2, increase_type=GameIncreaseModes.TIMES_2,
-        size=4, win_value=11, description=""
+        size=4, win_value=11, description="", backend="bitboard"
     ):
         self.size = size
         self.number_of_cells = size ** 2
         self.increase_type = increase_type
-        self.high_score = 0
         if increase_type == GameIncreaseModes.RANDOM:
             self.values = [0] + GameMode.shuffled
         else:
@@ -148,10 +397,32 @@ class GameMode:
                 self.values.append(self.increase(self.values[-1]))
         self.win_value = win_value
         self.description = description
+        self.backend = backend
 
     def name(self):
         return utils.get_key(Game.modes, self, is_same=False)
 
+    def game_values(self, seed):
+        """returns the values of blocks in a game, shuffled by the game's seed for RANDOM modes"""
+        # games saved before games had seeds use the values shuffled when the bot started
+        if self.increase_type != GameIncreaseModes.RANDOM or seed is None:
+            return self.values
+        if seed not in self.seeded_values:
+            if len(self.seeded_values) >= self.max_seeded_values:
+                self.seeded_values.clear()
+            values = list(range(1, len(self.values)))
+            random.Random(seed).shuffle(values)
+            self.seeded_values[seed] = array.array("B", [0] + values)
+        return self.seeded_values[seed]
+
+    def make_board(self):
+        """makes an empty board for the gamemode"""
+        if self.backend == "numpy":
+            # only imported here since numpy is optional
+            from game_2048.numpy_board import NumpyBoard
+            return NumpyBoard(self)
+        return BitBoard(self)
+
     def increase(self, value):
         """Increases cell value based on game mode"""
         if self.increase_type == GameIncreaseModes.TIMES_2:
@@ -176,8 +447,68 @@ class Directions(enum.Enum):
     RIGHT = Direction(("right", "r", ">"), True, True)
 
 
+MASK_64 = 2 ** 64 - 1
+GOLDEN_GAMMA = 0x9E3779B97F4A7C15
+
+
+def mix_64(value):
+    """splitmix64's output function, turns nearby ints into unrelated 64 bit ints"""
+    value = (value ^ value >> 30) * 0xBF58476D1CE4E5B9 & MASK_64
+    value = (value ^ value >> 27) * 0x94D049BB133111EB & MASK_64
+    return value ^ value >> 31
+
+
+class BlockRandom:
+    """
+    random numbers for one new block, made from the game's seed and the number of the block
+    so a game only needs its seed and how many moves it has made to make its next block
+    """
+    __slots__ = ("state",)
+
+    def __init__(self, seed, number):
+        self.state = seed + number * GOLDEN_GAMMA & MASK_64
+
+    def next(self):
+        self.state = self.state + GOLDEN_GAMMA & MASK_64
+        return mix_64(self.state)
+
+    def choice(self, items):
+        return items[self.next() % len(items)]
+
+    def randint(self, low, high):
+        return low + self.next() % (high - low + 1)
+
+
+class MoveLog:
+    """the moves played in a game, packed 4 to a byte so long games stay small when saved"""
+    __slots__ = ("data", "length")
+    letters = "udlr"
+
+    def __init__(self, moves=""):
+        self.data = bytearray()
+        self.length = 0
+        for move in moves:
+            self.append(move)
+
+    def __len__(self):
+        return self.length
+
+    def __str__(self):
+        return "".join(
+            self.letters[byte >> shift & 3] for byte in self.data for shift in (0, 2, 4, 6)
+        )[:self.length]
+
+    def append(self, move):
+        """adds a move, the first letter of its direction"""
+        if not self.length % 4:
+            self.data.append(0)
+        self.data[-1] |= self.letters.index(move) << self.length % 4 * 2
+        self.length += 1
+
+
 class Game:
     """class to represent each game of 2048"""
+    max_autoplay = 50
     modes = {
         "normal": GameMode(description="normal 2048"),
         "65536": GameMode(size=5, win_value=16, description="5x5 board"),
@@ -193,18 +524,40 @@ class Game:
         "confusion": GameMode(
             1, GameIncreaseModes.RANDOM,
             description="randomly generated block sequence"
-        )
+        ),
+        "8x8": GameMode(size=8, win_value=24, description="8x8 board"),
     }
-    game_commands = ["restart", "{direction}"]
-
-    def __init__(self, name):
+    def __init__(self, name, mode_name="normal", seed=None, board_class=None):
         self.name = name
-        self.score = 0
-        self.mode_name = "normal"
-        self.has_won = False
-        self.board = Board(self.mode())
-        for _ in range(2):
-            self.board.make_new_block(self.mode())
+        self.mode_name = mode_name
+        self.restart(seed=seed, board_class=board_class)
+
+    def __setstate__(self, state):
+        """converts the board of games saved before boards were BitBoards"""
+        self.__dict__.update(state)
+        if isinstance(self.board, Board):
+            values = self.board.values
+            self.board = self.mode().make_board()
+            self.board.set_values(values)
+        if "seed" not in state:
+            # games saved before games had a seed can't be replayed until they restart
+            self.seed = None
+            self.moves = MoveLog()
+        elif isinstance(self.moves, list):
+            self.moves = MoveLog(self.moves)
+        # games saved with a random number generator make new blocks from their seed instead
+        self.__dict__.pop("random", None)
+        self.__dict__.pop("_random", None)
+
+    @classmethod
+    def replay(cls, name, mode_name, seed, moves, board_class=None):
+        """
+        makes a game with seed and plays moves (eg. "uuddllrr" from Game.moves)
+        the game ends up the same as the game with that seed which played those moves
+        """
+        game = cls(name, mode_name, seed, board_class)
+        game.play_moves(moves)
+        return game
 
     def mode(self):
         return self.modes[self.mode_name]
@@ -215,7 +568,6 @@ class Game:
         if self.check_win() and not self.has_won:
             # check has_won so it doesnt say the player won forever after they win
             self.has_won = True
-            text += self.draw_game()
             text += "you won"
         elif not self.board.check_can_move():
             text += "you lost, use restart to restart"
@@ -227,73 +579,231 @@ class Game:
     def draw_game(self):
         """returns string representation of the game"""
         text = utils.join_items(
-            utils.description(self.name, self.mode().name(), newlines=0),
+            utils.description(self.name, self.mode_name, newlines=0),
             f"score: {self.score}",
             newlines=2
         )
         text += self.board.draw_board(self)
         return text
 
-    def restart(self, mode=None):
-        """Resets the game"""
+    def restart(self, mode=None, seed=None, board_class=None):
+        """
+        Resets the game with a new seed
+        every new block comes from the seed, so games with the same seed and moves are the same
+        """
         self.mode_name = utils.default(mode, self.mode_name)
         self.score = 0
-        if self.mode_name == "confusion":
-            self.setup_confusion()
-        self.board = Board(self.mode())
-        for _ in range(2):
-            self.board.make_new_block(self.mode())
+        self.seed = random.getrandbits(64) if seed is None else seed
+        # the first letter of each direction moved since the game started
+        self.moves = MoveLog()
+        self.board = board_class(self.mode()) if board_class else self.mode().make_board()
+        for number in range(2):
+            self.board.make_new_block(self.mode(), self.block_random(number))
         self.has_won = False
 
+    def block_random(self, number):
+        """returns the random numbers for the game's numberth new block"""
+        if self.seed is None:
+            return random
+        return BlockRandom(self.seed, number)
+
     def move(self, x, positive):
         """Moves all blocks"""
         if (x, positive) == (None, None):
             return
         if self.board.check_can_move():
-            old_board_values = [cell.value for cell in self.board.cells]
-            self.board.move_blocks(x, positive, self)
-
             # does not create new block if board is full or the board did not change
-            if old_board_values != [cell.value for cell in self.board.cells]:
-                self.board.make_new_block(self.mode())
+            if self.board.move_blocks(x, positive, self):
+                # the 2 blocks the game started with come first
+                self.board.make_new_block(self.mode(), self.block_random(len(self.moves) + 2))
 
     def check_win(self):
         """checks if the player has won"""
-        for block in self.board.cells:
-            if block.value == self.mode().win_value:
-                return True
-        return False
+        return self.board.largest_value() >= self.mode().win_value
 
-    def setup_confusion(self):
-        """shuffled the values for conffusion mode"""
-        GameMode.shuffled.remove(0)
-        random.shuffle(GameMode.shuffled)
-        GameMode.shuffled.insert(0, 0)
-        Game.modes["confusion"].values = GameMode.shuffled
+    def block_values(self):
+        """returns the value shown for each block, which confusion games shuffle by their seed"""
+        return self.mode().game_values(self.seed)
 
     def play_game(self, commands):
         """runs the main game loop once"""
         text = ""
-        command = next(commands)
-
-        # check player movement
-        for direction in Directions:
-            direction = direction.value
-            if command in direction.commands:
-                self.move(direction.x, direction.positive)
-                if self.score > self.mode().high_score:
-                    self.mode().high_score = self.score
-                break
-        else:
-            if command in self.modes:
-                if self.mode().size == self.modes[command].size:
-                    self.mode_name = command
-                else:
-                    self.restart(command)
-            elif command == "restart":
-                self.restart()
-            elif command != "":
-                text += "invalid command, use help to see commands\n"
+        command_name = next(commands)
+        command = command_registry.resolve("2048", command_name)
+
+        if command and command.category == "solver":
+            return self.play_search(command, commands)
+        elif command and command.category in ("in-game commands", "move", "modes"):
+            command.function(self, commands)
+        elif is_moves(command_name):
+            self.play_moves(command_name)
+        elif command_name != "":
+            text += "invalid command, use help to see commands\n"
 
         text += self.update()
         return utils.newline(text)
+
+    def move_direction(self, direction):
+        """moves all blocks in direction"""
+        # moved before the move is added, the new block is numbered by the moves before it
+        self.move(direction.x, direction.positive)
+        self.moves.append(direction.commands[1])
+
+    async def play_search(self, command, commands):
+        """runs a command which searches for moves, since searches run in the background"""
+        text = await command.function(self, commands)
+        text += self.update()
+        return utils.newline(text)
+
+    async def hint(self, commands):
+        """returns the best move found by the solver"""
+        direction, depth = await solver.search(self, solver.time_limit)
+        if direction is None:
+            return "there are no moves left\n"
+        return f"hint: {direction.name.lower()} (searched {depth} moves ahead)\n"
+
+    async def autoplay(self, commands):
+        """plays moves found by the solver, sharing the time limit between them"""
+        number_of_moves = next(commands)
+        if not number_of_moves.isdigit() or not 0 < int(number_of_moves) <= self.max_autoplay:
+            return f"Format: autoplay {{1-{self.max_autoplay}}}\n"
+        number_of_moves = int(number_of_moves)
+
+        moves_played = 0
+        for _ in range(number_of_moves):
+            direction, _ = await solver.search(self, solver.time_limit / number_of_moves)
+            if direction is None:
+                break
+            self.move_direction(direction.value)
+            moves_played += 1
+        return f"played {moves_played} moves\n"
+
+    def play_moves(self, moves):
+        """moves in the direction of each character in moves, stopping if the player loses"""
+        for key in moves:
+            if not self.board.check_can_move():
+                break
+            self.move_direction(move_keys[key])
+
+    def change_mode(self, mode_name):
+        """changes mode, restarting if the board size changes"""
+        if self.mode().size == self.modes[mode_name].size:
+            self.mode_name = mode_name
+        else:
+            self.restart(mode_name)
+
+
+class Player:
+    """represents a player of 2048, with their own games"""
+
+    def __init__(self):
+        self.games = {}
+        self.current_game_name = None
+
+    @property
+    def current_game(self):
+        """the game the player is playing"""
+        return self.games.get(self.current_game_name, None)
+
+    @current_game.setter
+    def current_game(self, game):
+        self.current_game_name = game.name if game else None
+
+
+class Leaderboard:
+    """
+    the best scores of a gamemode, with the best score of each game
+    entries are kept sorted so adding a score is a binary search
+    """
+    size = 10
+
+    def __init__(self):
+        # (-score, time, player, game), so the best and then oldest scores are first
+        self.entries = []
+        # (player, game) to its entry
+        self.best = {}
+        self.text = None
+
+    def add(self, player, game_name, score, time):
+        """adds a score, returns whether the leaderboard changed"""
+        old_entry = self.best.get((player, game_name), None)
+        if not score or (old_entry and -old_entry[0] >= score):
+            return False
+        entry = (-score, time, player, game_name)
+        if not old_entry and len(self.entries) >= self.size and entry > self.entries[-1]:
+            return False
+
+        if old_entry:
+            del self.entries[bisect.bisect_left(self.entries, old_entry)]
+        bisect.insort(self.entries, entry)
+        self.best[(player, game_name)] = entry
+        if len(self.entries) > self.size:
+            _, _, dropped_player, dropped_game = self.entries.pop()
+            del self.best[(dropped_player, dropped_game)]
+        self.text = None
+        return True
+
+    def high_score(self):
+        return -self.entries[0][0] if self.entries else 0
+
+    def draw(self, mode_name):
+        """returns the leaderboard as text, only remade when the leaderboard changes"""
+        if self.text is None:
+            self.text = utils.description(
+                mode_name,
+                *[
+                    f"{-negative_score} {game_name}" +
+                    # game names are only unique for each player
+                    ("" if player is None else f" (player {player})") + ", " +
+                    datetime.datetime.fromtimestamp(time).strftime("%Y-%m-%d")
+                    for negative_score, time, player, game_name in self.entries
+                ],
+                mode="long"
+            )
+        return self.text
+
+
+# boards this large move faster with numpy, so the mode is only added if it is installed
+if importlib.util.find_spec("numpy"):
+    Game.modes["16x16"] = GameMode(
+        size=16, win_value=32, description="16x16 board", backend="numpy"
+    )
+
+
+# one character commands for each direction, so many moves can be sent as one word
+move_keys = {
+    command: direction.value
+    for direction in Directions
+    for command in direction.value.commands
+    if len(command) == 1
+}
+
+
+def is_moves(word):
+    """checks if word is made of moves (eg. uuddllrr)"""
+    return bool(word) and all(key in move_keys for key in word)
+
+
+# every game command is called with the game and commands
+for direction in Directions:
+    command_registry.register(
+        "2048", direction.value.commands[0],
+        lambda game, commands, direction=direction.value: game.move_direction(direction),
+        category="move", aliases=direction.value.commands[1:]
+    )
+command_registry.register("2048", None, category="in-game commands", usage="{direction}")
+command_registry.register(
+    "2048", None, category="in-game commands", usage="{moves} (eg. uuddllrr)")
+for mode_name in Game.modes:
+    command_registry.register(
+        "2048", mode_name,
+        lambda game, commands, mode_name=mode_name: game.change_mode(mode_name),
+        category="modes"
+    )
+command_registry.register("2048", None, category="in-game commands", usage="{mode}")
+command_registry.register(
+    "2048", "restart", lambda game, commands: game.restart(), category="in-game commands")
+# solver commands are coroutines since the search runs in a process pool
+command_registry.register("2048", "hint", Game.hint, category="solver")
+command_registry.register(
+    "2048", "autoplay", Game.autoplay, category="solver", usage="autoplay {number_of_moves}")
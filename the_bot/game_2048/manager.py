@@ -1,6 +1,10 @@
 """
 manager for 2048 games
 """
+import asyncio
+import time
+
+import command_registry
 import utils
 import game_2048.classes as classes
 
@@ -8,24 +12,7 @@ CURRENT_GAME = "current game"
 
 class Manager2048:
     """manager for 2048 game"""
-    game_management_commands = [
-        "create {game_name}", "{game_name}", "rename {old_name} {new_name}",
-        "delete {game_name}", "games",
-    ]
-    reserved_words = (
-        classes.Game.game_commands + list(classes.Game.modes.keys()) +
-        [command for direction in classes.Directions for command in direction.value.commands] +
-        game_management_commands +
-        ["2048", "/2048", "current_game", "current game", "won", "lost", "restart"]
-    )
-    reserved_words = [
-        word
-        for words in reserved_words
-        for word in words.split()
-        if not word.startswith("{")
-    ]
     help_texts = {
-        "help": "",  # avoids probelems with referencing itself
         "modes": utils.join_items(
             *[
                 (mode_name, mode.description)
@@ -40,146 +27,245 @@ class Manager2048:
             ],
             description_mode="short"
         ),
-        "scores": utils.join_items(
-            *[
-                (mode_name, mode.high_score)
-                for mode_name, mode in classes.Game.modes.items()
-            ],
-            description_mode="short"
-        ),
-        "reserved": utils.description("reserved", *reserved_words)
     }
-    help_texts["help"] = utils.join_items(
-        ("in-game commands", *list(classes.Game.game_commands)),
-        ("game management", *game_management_commands),
-        ("informational", *list(help_texts)),
-        description_mode="long"
-    )
-    # needs to be here because resereved_words is declared first (avoid circular references)
-    reserved_words += list(help_texts)
-    games = {CURRENT_GAME: None}
+    # set after all commands are registered, at the bottom of the file
+    reserved_words = frozenset()
+    # game management commands which change the player, the rest only read it
+    changing_commands = frozenset(("create", "rename", "delete"))
 
     def __init__(self):
         self.load_game()
         self.save_game()
 
-    def update_high_scores(self):
-        self.help_texts["scores"] = utils.join_items(
-            *[
-                (mode_name, mode.high_score)
-                for mode_name, mode in classes.Game.modes.items()
-            ],
-            description_mode="short"
-        )
+    def get_player(self, user_id):
+        """returns the player with user_id, or a new player if they have not played yet"""
+        player = self.players.get(user_id, None)
+        return classes.Player() if player is None else player
 
-    def create_game(self, game_name):
-        """creates a new game in games dict"""
-        self.games[game_name] = classes.Game(game_name)
-        return self.games[game_name]
+    def get_leaderboard(self, mode_name):
+        """returns the leaderboard for a mode, making it if it does not exist"""
+        if mode_name not in self.leaderboards:
+            self.leaderboards[mode_name] = classes.Leaderboard()
+        return self.leaderboards[mode_name]
 
-    def verify_name(self, *names):
+    def update_leaderboard(self, user, game):
+        """adds the score of a game to its mode's leaderboard"""
+        if self.get_leaderboard(game.mode_name).add(user, game.name, game.score, time.time()):
+            self.leaderboards.mark(game.mode_name)
+            self.scores_text = None
+
+    def create_game(self, player, game_name):
+        """creates a new game in the player's games"""
+        player.games[game_name] = classes.Game(game_name)
+        return player.games[game_name]
+
+    def verify_name(self, player, *names):
         """verifies a name for a game"""
         for name in names:
             if name in self.reserved_words:
                 return "game names cannot be reserved words"
+            elif classes.is_moves(name):
+                return "game names cannot be moves"
             elif not name:
                 return "games must have names"
-            elif name in self.games.keys():
+            elif name in player.games:
                 return "names must be unique, note that names are NOT case-sensitive"
         return "valid"
 
     def run_game(self, user, commands):
         """runs the game based on commands"""
         output_text = ""
-        command = next(commands)
-        play_game_name = ""
+        player = self.get_player(user)
+        command_name = next(commands)
+        command = command_registry.resolve("2048", command_name)
 
         # processing commands
-        if command == "create":
-            new_game_name = next(commands)
-            valid = self.verify_name(new_game_name)
-            if valid != "valid":
-                return valid
-            self.create_game(new_game_name)
-            play_game_name = new_game_name
-
-        elif command == "rename":
-            old_name = next(commands)
-            new_name = next(commands)
-
-            valid = self.verify_name(new_name)
-            if valid != "valid":
-                return valid
-            elif old_name not in self.games.keys():
-                return "that game does not exist"
-
-            self.games[new_name] = self.games.pop(old_name)
-            self.games[new_name].name = new_name
-            play_game_name = new_name
-            output_text = f"renamed {old_name} to {new_name}"
-
-        elif command == "delete":
-            output_text = self.delete_game(commands)
-
-        elif command in self.games:
-            self.games[CURRENT_GAME] = self.games[command]
-
-        elif command == "games":
-            output_text += utils.newline(utils.default(utils.join_items(
-                *[
-                    utils.description(
-                        game_name, game.mode_name, game.score)
-                    for game_name, game in self.games.items()
-                    if game_name != CURRENT_GAME
-                ],
-            ), "there are no games"), 2)
-
-        elif command in self.help_texts:
-            output_text += self.help_texts[command]
-
+        if command and command.category in ("game management", "informational"):
+            output_text = command.function(self, player, commands)
+            if command.name in self.changing_commands:
+                self.save_player(user, player)
+        elif command_name in player.games:
+            player.current_game = player.games[command_name]
+            self.save_player(user, player)
+        elif command_name in self.unowned_games:
+            # games made before each player had their own games go to the first player to play them
+            player.games[command_name] = self.unowned_games.pop(command_name)
+            player.current_game = player.games[command_name]
+            self.save_player(user, player)
         else:
-            # moves the generator back one command because the command was not used
-            commands.send(-1)
-
-        play_game_name = utils.default(play_game_name, CURRENT_GAME)
-        self.games[CURRENT_GAME] = self.games[play_game_name]
+            # moves back one command because the command was not used
+            commands.rewind()
 
         if output_text:
             return output_text
 
         # plays game
-        if self.games[CURRENT_GAME]:
-            output_text = self.games[CURRENT_GAME].play_game(
-                commands)
+        game = player.current_game
+        if game:
+            output_text = game.play_game(commands)
         else:
             output_text = "no game selected"
 
-        self.update_high_scores()
+        if asyncio.iscoroutine(output_text):
+            # the player stays loaded while searching, so the moves are not made on a copy
+            self.players.pin(user)
+            return self.finish_search(output_text, user, game)
+        if game:
+            self.save_player(user, player)
+            self.update_leaderboard(user, game)
         return output_text
 
+    def save_player(self, user, player):
+        """marks a player changed by a command, so only commands which change players save them"""
+        if user in self.players:
+            self.players.mark(user)
+        elif player.games:
+            # new players are only saved once they have a game, not when they read help
+            self.players[user] = player
+
+    async def finish_search(self, searching, user, game):
+        """waits for a game command which searches for moves"""
+        try:
+            output_text = await searching
+        finally:
+            self.players.unpin(user)
+        # saves made while searching may have saved the player before the moves
+        self.players.mark(user)
+        self.update_leaderboard(user, game)
+        return output_text
+
+    def create(self, player, commands):
+        """creates a game and makes it the current game"""
+        new_game_name = next(commands)
+        valid = self.verify_name(player, new_game_name)
+        if valid != "valid":
+            return valid
+        player.current_game = self.create_game(player, new_game_name)
+        return ""
+
+    def rename(self, player, commands):
+        """renames a game and makes it the current game"""
+        old_name = next(commands)
+        new_name = next(commands)
+
+        valid = self.verify_name(player, new_name)
+        if valid != "valid":
+            return valid
+        elif old_name not in player.games:
+            return "that game does not exist"
+
+        player.games[new_name] = player.games.pop(old_name)
+        player.games[new_name].name = new_name
+        player.current_game = player.games[new_name]
+        return f"renamed {old_name} to {new_name}"
+
+    def list_games(self, player, commands):
+        """returns the player's games"""
+        return utils.newline(utils.default(utils.join_items(
+            *[
+                utils.description(
+                    game_name, game.mode_name, game.score)
+                for game_name, game in player.games.items()
+            ],
+        ), "there are no games"), 2)
+
+    def scores(self, player, commands):
+        """returns the high score of each mode, or the leaderboard of one mode"""
+        mode_name = next(commands)
+        if mode_name in classes.Game.modes:
+            return self.get_leaderboard(mode_name).draw(mode_name)
+        elif mode_name:
+            return "that mode does not exist"
+
+        if self.scores_text is None:
+            self.scores_text = utils.join_items(
+                *[
+                    (mode_name, self.get_leaderboard(mode_name).high_score())
+                    for mode_name in classes.Game.modes
+                ],
+                description_mode="short"
+            )
+        return self.scores_text
+
+    def help_(self, player, commands):
+        """returns help text"""
+        return command_registry.help_text(
+            "2048", categories=("in-game commands", "solver", "game management", "informational")
+        )
+
     def load_game(self):
         """loads games from file"""
-        self.games, scores = utils.load("games_2048", "scores_2048")
-        for mode_name, mode in classes.Game.modes.items():
-            mode.high_score = scores.get(mode_name, 0)
+        # each player's games are saved together, so playing only loads that player's games
+        self.players = utils.LazyRecords("players_2048")
+        # games saved before each player had their own games
+        self.unowned_games = utils.LazyRecords("games_2048")
+        self.leaderboards = utils.Records.load("scores_2048")
+        self.scores_text = None
+
+        # older saves stored the current game as a copy of the game
+        if CURRENT_GAME in self.unowned_games:
+            del self.unowned_games[CURRENT_GAME]
+
+        # older saves stored the high score of each mode
+        for mode_name, high_score in list(self.leaderboards.items()):
+            if isinstance(high_score, int):
+                self.leaderboards[mode_name] = classes.Leaderboard()
+                self.leaderboards[mode_name].add(None, "old high score", high_score, time.time())
 
     def save_game(self):
-        """saves games to a json file"""
-        scores = {
-            mode_name: mode.high_score
-            for mode_name, mode in classes.Game.modes.items()
-        }
-        utils.save(games_2048=self.games, scores_2048=scores)
-
-    def delete_game(self, commands):
+        """saves changed players, unowned games and leaderboards"""
+        for records in (self.players, self.unowned_games, self.leaderboards):
+            records.save()
+
+    def delete_game(self, player, commands):
         """deletes a game"""
         delete_game_name = next(commands)
         if not delete_game_name:
             return "you must give the name of the game"
-        elif delete_game_name not in self.games.keys():
+        elif delete_game_name not in player.games:
             return "that game does not exist"
         else:
-            if self.games[CURRENT_GAME] == self.games[delete_game_name]:
-                self.games[CURRENT_GAME] = None
-            del self.games[delete_game_name]
+            if player.current_game_name == delete_game_name:
+                player.current_game = None
+            del player.games[delete_game_name]
             return f"{delete_game_name} deleted"
+
+
+command_registry.register(
+    "2048", "create", Manager2048.create,
+    category="game management", usage="create {game_name}"
+)
+command_registry.register("2048", None, category="game management", usage="{game_name}")
+command_registry.register(
+    "2048", "rename", Manager2048.rename,
+    category="game management", usage="rename {old_name} {new_name}"
+)
+command_registry.register(
+    "2048", "delete", Manager2048.delete_game,
+    category="game management", usage="delete {game_name}"
+)
+command_registry.register("2048", "games", Manager2048.list_games, category="game management")
+command_registry.register("2048", "help", Manager2048.help_, category="informational")
+for help_name in ("modes", "move"):
+    command_registry.register(
+        "2048", help_name,
+        lambda manager, player, commands, help_name=help_name: manager.help_texts[help_name],
+        category="informational"
+    )
+command_registry.register(
+    "2048", "scores", Manager2048.scores, category="informational", usage="scores {mode}")
+command_registry.register(
+    "2048", "reserved",
+    lambda manager, player, commands: manager.help_texts["reserved"],
+    category="informational"
+)
+
+Manager2048.reserved_words = frozenset(
+    word
+    for words in command_registry.names("2048") + [
+        "2048", "/2048", "current_game", "current game", "won", "lost",
+    ]
+    for word in words.split()
+)
+Manager2048.help_texts["reserved"] = utils.description(
+    "reserved", *sorted(Manager2048.reserved_words))
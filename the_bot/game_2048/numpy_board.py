@@ -0,0 +1,105 @@
+"""
+2048 board stored in a numpy array, for modes with large boards
+only imported when one of those modes is played, since numpy is optional
+"""
+import random
+
+import numpy
+
+from game_2048 import classes
+
+
+class NumpyBoard(classes.BaseBoard):
+    """
+    represents a board for 2048 as a size by size array of the exponent of each block
+    every line is moved at once, by turning the board so blocks move toward column 0
+    """
+
+    def __init__(self, mode):
+        super().__init__(mode)
+        self.tiles = numpy.zeros((self.size, self.size), dtype=numpy.int16)
+
+    def __getstate__(self):
+        # saved as a list so saves do not depend on how numpy pickles arrays
+        state = super().__getstate__()
+        state["tiles"] = self.tiles.tolist()
+        return state
+
+    def __setstate__(self, state):
+        super().__setstate__(state)
+        self.tiles = numpy.array(self.tiles, dtype=numpy.int16)
+
+    @property
+    def values(self):
+        """the value of every cell"""
+        return self.tiles.ravel().tolist()
+
+    def set_values(self, values):
+        """sets the value of every cell"""
+        self.tiles = numpy.array(values, dtype=numpy.int16).reshape(self.size, self.size)
+
+    def lines(self, x, positive):
+        """returns a view of the board where the blocks in each row move toward column 0"""
+        lines = self.tiles if x else self.tiles.T
+        return lines[:, ::-1] if positive else lines
+
+    @staticmethod
+    def compress(lines):
+        """moves the blocks in each line to its start, keeping their order"""
+        order = numpy.argsort(lines == 0, axis=1, kind="stable")
+        return numpy.take_along_axis(lines, order, axis=1)
+
+    def move_blocks(self, x, positive, game):
+        """Moves all blocks in the board, returns whether any block moved"""
+        view = self.lines(x, positive)
+        lines = self.compress(view)
+
+        # a block merges with the next block if they are the same, and it is an even
+        # number of blocks into the run of the same blocks, so blocks only merge once
+        same = (lines[:, 1:] == lines[:, :-1]) & (lines[:, 1:] != 0)
+        positions = numpy.arange(self.size)
+        run_starts = numpy.where(
+            numpy.concatenate((numpy.zeros((self.size, 1), bool), same), axis=1),
+            0, positions
+        )
+        run_positions = positions - numpy.maximum.accumulate(run_starts, axis=1)
+        merges = same & (run_positions[:, :-1] % 2 == 0)
+
+        if merges.any():
+            lines[:, :-1][merges] += 1
+            lines[:, 1:][merges] = 0
+            for value in lines[:, :-1][merges].tolist():
+                game.score += game.mode().increase_score(value)
+            lines = self.compress(lines)
+
+        moved = not numpy.array_equal(lines, view)
+        view[...] = lines
+        return moved
+
+    def check_can_move(self):
+        """Checks if the player can move"""
+        tiles = self.tiles
+        return bool(
+            self.number_of_empty_cells() or
+            (tiles[:, 1:] == tiles[:, :-1]).any() or
+            (tiles[1:] == tiles[:-1]).any()
+        )
+
+    def largest_value(self):
+        """returns the value of the largest block"""
+        return int(self.tiles.max())
+
+    def number_of_empty_cells(self):
+        """Checks if the board is full and return number of empty spaces"""
+        return int(numpy.count_nonzero(self.tiles == 0))
+
+    def make_new_block(self, mode, rng=random):
+        """Makes random new block, using rng (the game's random number generator)"""
+        empty_cells = numpy.flatnonzero(self.tiles == 0).tolist()
+        if not empty_cells:
+            return
+        empty_cell = rng.choice(empty_cells)
+        value = 1
+        if rng.randint(0, 10) == 10:
+            value = 2
+        self.tiles.flat[empty_cell] = value
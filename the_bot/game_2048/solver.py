@@ -0,0 +1,174 @@
+"""
+finds moves for 2048 games with an expectimax search
+searches run in a process pool so the bot keeps handling messages while they run
+"""
+import asyncio
+import concurrent.futures
+import time
+
+from game_2048 import classes
+
+# set from the command line arguments by Handler
+time_limit = 0.5
+processes = 1
+pool = None
+
+# chance branches less likely than this are estimated with the heuristic instead
+min_probability = 0.0001
+max_depth = 8
+
+# heuristic weights for each row and column
+lost_penalty = 200000
+empty_weight = 270
+merge_weight = 700
+monotonicity_power = 4
+monotonicity_weight = 47
+sum_power = 3.5
+sum_weight = 11
+
+# (shifts, line) to the heuristic score of the line
+line_scores = {}
+max_line_scores = 2 ** 16
+
+
+class OutOfTime(Exception):
+    """raised when a search runs past its deadline"""
+
+
+def get_pool():
+    """returns the process pool, starting it on first use"""
+    global pool
+    if pool is None:
+        pool = concurrent.futures.ProcessPoolExecutor(processes)
+    return pool
+
+
+async def search(game, time_limit):
+    """
+    finds the best move for game without blocking the event loop
+    returns the best direction (or None if the game is lost) and how many moves ahead were searched
+    """
+    values = game.board.values
+    if not processes:
+        return best_move(values, game.mode(), time_limit)
+    return await asyncio.get_event_loop().run_in_executor(
+        get_pool(), best_move, values, game.mode(), time_limit
+    )
+
+
+def best_move(values, mode, time_limit):
+    """
+    searches deeper until time_limit seconds have passed
+    returns the best direction (or None if there are no moves) and the depth searched
+    """
+    board = classes.BitBoard(mode)
+    board.set_values(values)
+    deadline = time.monotonic() + time_limit
+
+    best = None
+    depth = 0
+    while True:
+        table = {}
+        try:
+            scores = {
+                direction: chance_value(board, moved, depth, 1, mode, deadline, table)
+                for direction, moved in moves(board, board.tiles)
+            }
+        except OutOfTime:
+            break
+        if not scores:
+            return None, depth
+        best = max(scores, key=scores.get)
+        depth += 1
+        if depth > max_depth:
+            break
+    return best, depth
+
+
+def moves(board, tiles):
+    """generates each direction the blocks can move and the tiles after the move"""
+    for direction in classes.Directions:
+        moved = tiles
+        for shift, mask, shifts in board.lines(direction.value.x, direction.value.positive):
+            line = tiles >> shift & mask
+            moved_line = board.move_line(line, shifts)[0]
+            if moved_line != line:
+                moved = moved & ~(mask << shift) | moved_line << shift
+        if moved != tiles:
+            yield direction, moved
+
+
+def max_value(board, tiles, depth, probability, mode, deadline, table):
+    """the value of tiles when the player moves next"""
+    if time.monotonic() > deadline:
+        raise OutOfTime
+    return max(
+        (
+            chance_value(board, moved, depth, probability, mode, deadline, table)
+            for _, moved in moves(board, tiles)
+        ),
+        default=0
+    )
+
+
+def chance_value(board, tiles, depth, probability, mode, deadline, table):
+    """the value of tiles when a new block is made next, averaged over every new block"""
+    if depth == 0 or probability < min_probability:
+        return evaluate(board, tiles)
+    if (tiles, depth) in table:
+        return table[(tiles, depth)]
+
+    empty_shifts = []
+    empty_cells = board.empty_cells(tiles)
+    while empty_cells:
+        lowest_bit = empty_cells & -empty_cells
+        empty_shifts.append(lowest_bit.bit_length() - 1)
+        empty_cells ^= lowest_bit
+
+    total = 0
+    for shift in empty_shifts:
+        for value, chance in mode.new_block_chances.items():
+            total += chance * max_value(
+                board, tiles | value << shift, depth - 1,
+                probability * chance / len(empty_shifts), mode, deadline, table
+            )
+    value = total / len(empty_shifts)
+    table[(tiles, depth)] = value
+    return value
+
+
+def evaluate(board, tiles):
+    """heuristic score for tiles, the sum of the scores of every row and column"""
+    score = 0
+    for x in (True, False):
+        for shift, mask, shifts in board.lines(x, False):
+            line = tiles >> shift & mask
+            key = (shifts, line)
+            if key not in line_scores:
+                if len(line_scores) >= max_line_scores:
+                    line_scores.clear()
+                line_scores[key] = line_score([line >> shift & board.mask for shift in shifts])
+            score += line_scores[key]
+    return score
+
+
+def line_score(values):
+    """heuristic score for one row or column, rewarding empty cells, merges and order"""
+    empty = values.count(0)
+    blocks = [value for value in values if value]
+    merges = sum(1 for first, second in zip(blocks, blocks[1:]) if first == second)
+
+    increasing = decreasing = 0
+    for first, second in zip(values, values[1:]):
+        if first > second:
+            decreasing += first ** monotonicity_power - second ** monotonicity_power
+        else:
+            increasing += second ** monotonicity_power - first ** monotonicity_power
+
+    return (
+        lost_penalty +
+        empty * empty_weight +
+        merges * merge_weight -
+        min(increasing, decreasing) * monotonicity_weight -
+        sum(value ** sum_power for value in values) * sum_weight
+    )
@@ -2,11 +2,90 @@
 functions shared between games that don't fit in utils
 """
 import utils
+import collections
 import math
 
 HANGOUTS_CHAR_LIMIT = 2000
 
 
+class PlayerIndex:
+    """
+    index of the names of a game's players, so players are found without checking every player
+    names are saved by themselves in table so building the index does not load every player
+    ids are ordered as strings, since saves can have both int and str ids
+    """
+    # names are split into every substring this long or shorter
+    ngram_length = 3
+
+    def __init__(self, table, players):
+        self.players = players
+        self.names = utils.Records.load(table)
+        # saves from before the index
+        if not self.names:
+            for id_, player in players.items():
+                self.names[id_] = player.name
+        # name to the ids of the players with that name
+        self.name_ids = collections.defaultdict(set)
+        # substring to the ids of the players whose name contains it
+        self.ngram_ids = collections.defaultdict(set)
+        for id_, name in self.names.items():
+            self.add_name(id_, name)
+
+    def ngrams(self, name):
+        """returns every substring of name up to ngram_length long"""
+        return {
+            name[start:start + length]
+            for length in range(1, self.ngram_length + 1)
+            for start in range(len(name) - length + 1)
+        }
+
+    def add_name(self, id_, name):
+        self.name_ids[name].add(id_)
+        for ngram in self.ngrams(name):
+            self.ngram_ids[ngram].add(id_)
+
+    def remove_name(self, id_, name):
+        self.name_ids[name].discard(id_)
+        if not self.name_ids[name]:
+            del self.name_ids[name]
+        for ngram in self.ngrams(name):
+            self.ngram_ids[ngram].discard(id_)
+            if not self.ngram_ids[ngram]:
+                del self.ngram_ids[ngram]
+
+    def set_name(self, id_, name):
+        """adds a player to the index, or changes their name if they are already in it"""
+        if id_ in self.names:
+            self.remove_name(id_, self.names[id_])
+        self.names[id_] = name
+        self.add_name(id_, name)
+
+    def id_of(self, name):
+        """returns the id of the player called name (the lowest if names are shared), or None"""
+        return min(self.name_ids.get(name, ()), key=str, default=None)
+
+    def get(self, name):
+        """returns the player called name, or None"""
+        id_ = self.id_of(name)
+        return None if id_ is None else self.players[id_]
+
+    def search(self, text):
+        """returns the ids of players whose name contains text, in order"""
+        if not text:
+            return sorted(self.names, key=str)
+        if len(text) <= self.ngram_length:
+            return sorted(self.ngram_ids.get(text, ()), key=str)
+        # players with every ngram of text might still not have them in order
+        candidates = set.intersection(*[
+            self.ngram_ids.get(text[start:start + self.ngram_length], set())
+            for start in range(len(text) - self.ngram_length + 1)
+        ])
+        return sorted((id_ for id_ in candidates if text in self.names[id_]), key=str)
+
+    def save(self):
+        self.names.save()
+
+
 def profile(self, player, commands):
     """returns player profiles"""
     PLAYERS_PER_PAGE = 5
@@ -19,55 +98,59 @@ def profile(self, player, commands):
     except TypeError:
         page = 1
 
-    # create list of players
-    possible_players = []
-    for possible_player in players.values():
-        if player_name in possible_player.name:
-            possible_players.append(possible_player)
-    if player_name.isdigit() and int(player_name) in players:
-        possible_players.append(players[int(player_name)])
+    # create list of players, only the players on the page are loaded
+    possible_ids = self.player_index.search(player_name)
+    # hangouts ids are strings, ids from older saves may be ints
+    if player_name in players:
+        possible_ids.append(player_name)
+    elif player_name.isdigit() and int(player_name) in players:
+        possible_ids.append(int(player_name))
     elif player_name == "self":
-        possible_players.append(player)
+        possible_ids.append(player.get_id())
     elif player_name == "all":
-        possible_players = list(players.values())
+        possible_ids = sorted(players.keys(), key=str)
 
     # input validation
-    if not possible_players:
+    if not possible_ids:
         return "No players go by that name/id!"
 
-    if len(possible_players) > 1:
+    if len(possible_ids) > 1:
         output_text += utils.newline(
-            f"{len(possible_players)} player(s) go by that name:")
+            f"{len(possible_ids)} player(s) go by that name:")
     try:
-        possible_players_slice = possible_players[
+        possible_ids_slice = possible_ids[
             (page - 1) * PLAYERS_PER_PAGE: page * PLAYERS_PER_PAGE
         ]
     except IndexError:
-        if page * 5 > len(possible_players):
-            possible_players_slice = possible_players[0:]
+        if page * 5 > len(possible_ids):
+            possible_ids_slice = possible_ids[0:]
         else:
-            possible_players_slice = possible_players[(page - 1) * PLAYERS_PER_PAGE:]
+            possible_ids_slice = possible_ids[(page - 1) * PLAYERS_PER_PAGE:]
 
     output_text += utils.join_items(
         *[
-            player.profile()
-            for player in possible_players_slice
+            players[id_].profile()
+            for id_ in possible_ids_slice
         ], separator="\n" * 2
-    ) + f"{page}/{math.ceil(len(possible_players) / PLAYERS_PER_PAGE)}"
+    ) + f"{page}/{math.ceil(len(possible_ids) / PLAYERS_PER_PAGE)}"
     return output_text
 
 
-def get_players(players, player_name, running_player=None, single=False):
-    possible_players = []
-    for possible_player in players.values():
-        if (
-            (not single and player_name in possible_player.name)
-            or (single and player_name == possible_player.name)
-        ):
-            possible_players.append(possible_player)
+def get_players(player_index, player_name, running_player=None, single=False):
+    """
+    returns the players whose name contains player_name, or has player_name as their id
+    if single, returns the player called exactly player_name
+    """
+    if single:
+        possible_ids = [player_index.id_of(player_name)]
+        if possible_ids[0] is None:
+            possible_ids = []
+    else:
+        possible_ids = player_index.search(player_name)
+    possible_players = [player_index.players[id_] for id_ in possible_ids]
 
-    if player_name.isdigit() and int(player_name) in players:
-        possible_players.append(players[int(player_name)])
+    if player_name.isdigit() and int(player_name) in player_index.players:
+        possible_players.append(player_index.players[int(player_name)])
     elif player_name == "self" and running_player:
         possible_players.append(running_player)
     return utils.default(possible_players[0], possible_players, single)
@@ -1,12 +1,16 @@
 """
 handler for bots
 """
-import random
+import asyncio
 import collections
-import datetime
+import contextlib
+import weakref
+import command_registry
 import utils
+import saver
 
 from game_2048.manager import Manager2048
+from game_2048 import solver
 from economy.manager import EconomyManager
 from rpg.manager import RPGManager
 
@@ -34,10 +38,15 @@ class Handler:
     def __init__(self, args, *, console=False):
         self.cooldowns = collections.defaultdict(dict)
         self.console = console
+        self.locks = weakref.WeakValueDictionary()
         Handler.game_managers["/rpg"] = RPGManager(
             load_sheets=args.load_sheets
         )
-        random.seed(datetime.datetime.now())
+        self.saver = saver.Saver(args.save_interval, args.save_commands)
+        utils.saver = self.saver
+        self.saver.start()
+        solver.time_limit = args.hint_time / 1000
+        solver.processes = args.solver_processes
 
     async def handle_message(self, event, user_id=101, bot=None):
         """handles messages"""
@@ -45,7 +54,7 @@ class Handler:
         text = event if self.console else event.text
         if not self.console:
             user, conv = utils.get_user_and_conv(bot._convo_list, event)
-        commands = utils.command_parser(text)
+        commands = utils.CommandParser(text)
         command = next(commands)
 
         # deals with commands
@@ -54,25 +63,27 @@ class Handler:
             # so it should be skipped
             command = next(commands)
 
-        if command in self.keywords:
+        registered_command = command_registry.resolve("", command)
+        category = registered_command.category if registered_command else None
+
+        if category == "keywords":
             output_text = self.keywords[command]
 
-        elif command in self.images:
+        elif category == "images":
             if self.console:
                 output_text = f"images are not available outside of hangouts, including {command}"
             else:
-                with open(self.image_folder + self.images[command], "rb") as image:
-                    await bot.send_image(image, conv)
+                await bot.send_image(self.image_folder + self.images[command], conv)
 
-        elif command in self.commands:
+        elif category == "commands":
             if self.console:
                 output_text = f"command {command} is not available outside of hangouts"
             else:
-                output_text = await self.commands[command](self, bot, user, conv, commands)
+                output_text = await registered_command.function(self, bot, user, conv, commands)
 
-        elif command in self.game_managers:
+        elif category == "games":
             user_id = user_id if self.console else user.id_[0]
-            output_text = self.play_game(user_id, command, commands)
+            output_text = await self.play_game(user_id, command, commands)
             # fixes difference in character width in hangouts vs monospaced consoles
             output_text = utils.default(output_text.replace(
                 "  ", " "), output_text, self.console)
@@ -83,9 +94,42 @@ class Handler:
 
         return output_text
 
+    def lock_keys(self, user_id, text):
+        """returns the keys of the locks a message needs"""
+        user_id = int(user_id)
+        keys = [("player", user_id)]
+        words = utils.clean(text)
+        command = words[1] if words[0] == "sudo" and len(words) > 1 else words[0]
+        if command in ("rpg", "/rpg"):
+            player = self.game_managers[command].game.players.get(user_id, None)
+            if player:
+                keys.append(("party", player.party_name))
+        return sorted(keys)
+
+    @contextlib.asynccontextmanager
+    async def lock(self, user_id, text):
+        """
+        makes messages from the same player (or rpg party) run one at a time
+        while messages from other players run concurrently
+        """
+        locks = []
+        for key in self.lock_keys(user_id, text):
+            lock = self.locks.get(key)
+            if lock is None:
+                lock = self.locks[key] = asyncio.Lock()
+            locks.append(lock)
+        # locks are always acquired in sorted key order so they cannot deadlock
+        for lock in locks:
+            await lock.acquire()
+        try:
+            yield
+        finally:
+            for lock in reversed(locks):
+                lock.release()
+
     async def rename_conv(self, bot, user, conv, commands):
         """renames a conversation"""
-        new_name = commands.send("remaining")
+        new_name = commands.remaining()
         if not new_name:
             return "Format: /rename {name}"
         else:
@@ -103,11 +147,24 @@ class Handler:
             description_mode="short"
         )
 
-    def play_game(self, user_id, game_name, commands):
+    async def inbox_stats(self, bot, user, conv, commands):
+        """returns how many messages were queued, dropped and processed"""
+        return utils.join_items(
+            *bot.inbox.counters.items(),
+            ("waiting", bot.inbox.size),
+            description_mode="short"
+        )
+
+    async def play_game(self, user_id, game_name, commands):
         """plays a game"""
         manager = self.game_managers[game_name]
         game_text = manager.run_game(user_id, commands)
+        # games return a coroutine for commands which run in the background (eg. 2048 hint)
+        if asyncio.iscoroutine(game_text):
+            game_text = await game_text
+        # only queues the changes, self.saver writes them in the background
         manager.save_game()
+        self.saver.command_done()
         return game_text
 
     async def quit_(self, bot, user, conv, comands):
@@ -124,22 +181,24 @@ class Handler:
         "/quit": quit_,
         "/id": id_,
         "/info": info,
+        "/inbox": inbox_stats,
     }
     keywords = {
         "ping": "pong",
         "pong": "ping",
         "saber": "hi",
         "meep": "meep",
-        "/help": ""  # this avoids errors where keywords and help_text reference eachother
+        "/help": ""  # set at the bottom of the file once every command is registered
     }
-    help_text = utils.join_items(
-        "I'm a bot by Astolfo and Chendi.",
-        "You can view my source at https://github.com/YellowPapaya/hangouts-bot"
-    ) + utils.join_items(
-        ("keywords", *list(keywords)),
-        ("games", *list(game_managers)),
-        ("commands", *list(commands)),
-        ("images", *list(images)),
-        description_mode="long"
-    )
-    keywords["/help"] = help_text
+
+
+command_registry.register_all("", dict.fromkeys(Handler.keywords), category="keywords")
+# /rpg is added to game_managers by Handler.__init__ since it loads sheets data
+command_registry.register_all("", dict.fromkeys([*Handler.game_managers, "/rpg"]), category="games")
+command_registry.register_all("", Handler.commands, category="commands")
+command_registry.register_all("", dict.fromkeys(Handler.images), category="images")
+Handler.help_text = utils.join_items(
+    "I'm a bot by Astolfo and Chendi.",
+    "You can view my source at https://github.com/YellowPapaya/hangouts-bot"
+) + command_registry.help_text("")
+Handler.keywords["/help"] = Handler.help_text
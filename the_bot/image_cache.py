@@ -0,0 +1,57 @@
+"""
+cache for images sent to hangouts
+"""
+import asyncio
+import collections
+import hashlib
+import io
+import os
+
+Image = collections.namedtuple("Image", "modified size data digest")
+
+
+class ImageCache:
+    """
+    keeps images in memory and remembers the id hangouts gives each uploaded image
+    so an image is only uploaded again if its file changes
+    """
+
+    def __init__(self, client):
+        self.client = client
+        self.images = {}
+        self.uploads = {}
+
+    def preload(self, paths):
+        """loads images into memory"""
+        for path in paths:
+            try:
+                self.load(path)
+            except OSError as error:
+                print(f"could not load image {path}: {error}")
+
+    def load(self, path):
+        """returns an image, reading it again if the file changed"""
+        stat = os.stat(path)
+        image = self.images.get(path, None)
+        if image and (image.modified, image.size) == (stat.st_mtime_ns, stat.st_size):
+            return image
+
+        with open(path, "rb") as image_file:
+            data = image_file.read()
+        image = Image(stat.st_mtime_ns, stat.st_size, data, hashlib.sha1(data).hexdigest())
+        self.images[path] = image
+        return image
+
+    async def image_id(self, path):
+        """returns the hangouts id of an image, uploading it if needed"""
+        image = self.load(path)
+        # stores the upload task so an image being uploaded is not uploaded twice
+        if image.digest not in self.uploads:
+            self.uploads[image.digest] = asyncio.ensure_future(self.client.upload_image(
+                io.BytesIO(image.data), filename=os.path.basename(path)
+            ))
+        try:
+            return await self.uploads[image.digest]
+        except Exception:
+            self.uploads.pop(image.digest, None)
+            raise
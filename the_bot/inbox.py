@@ -0,0 +1,67 @@
+"""
+queue for incoming hangouts messages
+"""
+import asyncio
+import collections
+
+
+class Inbox:
+    """
+    bounded queue of incoming messages
+    messages are taken from each conversation in turn so a busy conversation can't starve the rest
+
+    policies for when the queue is full:
+        drop_oldest - drops the oldest message of the conversation with the most queued messages
+        busy - refuses the new message so the bot can reply that it is busy
+    """
+    policies = ("drop_oldest", "busy")
+
+    def __init__(self, max_size=100, policy="drop_oldest"):
+        if policy not in self.policies:
+            raise ValueError(f"policy {policy} does not exist for inboxes")
+        if max_size < 1:
+            raise ValueError("inboxes must hold at least 1 message")
+        self.max_size = max_size
+        self.policy = policy
+        self.conversations = collections.OrderedDict()
+        self.size = 0
+        self.ready = asyncio.Event()
+        self.counters = collections.Counter(queued=0, dropped=0, processed=0)
+
+    def put(self, conv_id, message):
+        """queues a message, returns False if the message was refused"""
+        if self.size >= self.max_size:
+            self.counters["dropped"] += 1
+            if self.policy == "busy":
+                return False
+            busiest_id = max(self.conversations, key=lambda id_: len(self.conversations[id_]))
+            self.conversations[busiest_id].popleft()
+            if not self.conversations[busiest_id]:
+                del self.conversations[busiest_id]
+            self.size -= 1
+
+        if conv_id not in self.conversations:
+            self.conversations[conv_id] = collections.deque()
+        self.conversations[conv_id].append(message)
+        self.size += 1
+        self.counters["queued"] += 1
+        self.ready.set()
+        return True
+
+    async def get(self):
+        """waits for and returns the next message"""
+        while not self.size:
+            self.ready.clear()
+            await self.ready.wait()
+
+        # the conversation goes to the back of the line after each message
+        conv_id, messages = self.conversations.popitem(last=False)
+        message = messages.popleft()
+        if messages:
+            self.conversations[conv_id] = messages
+        self.size -= 1
+        return message
+
+    def done(self):
+        """counts a processed message"""
+        self.counters["processed"] += 1
@@ -0,0 +1,160 @@
+"""
+queue for outgoing hangouts messages
+"""
+import asyncio
+
+import hangups
+
+import game_utils
+import utils
+
+
+class TokenBucket:
+    """rate limiter allowing rate actions per second, with bursts of up to capacity"""
+
+    def __init__(self, rate=2, capacity=5):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.last_update = None
+
+    async def take(self):
+        """waits until an action is allowed"""
+        loop = asyncio.get_event_loop()
+        while True:
+            now = loop.time()
+            if self.last_update is not None:
+                self.tokens = min(
+                    self.capacity, self.tokens + (now - self.last_update) * self.rate
+                )
+            self.last_update = now
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return
+            await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+def split_message(text, limit=game_utils.HANGOUTS_CHAR_LIMIT):
+    """splits text into parts no longer than limit, at newlines when possible"""
+    parts = []
+    while len(text) > limit:
+        split_index = text.rfind("\n", 0, limit)
+        if split_index <= 0:
+            split_index = limit
+        parts.append(text[:split_index])
+        text = text[split_index:].lstrip("\n")
+    if text:
+        parts.append(text)
+    return parts
+
+
+def join_messages(texts, limit=game_utils.HANGOUTS_CHAR_LIMIT):
+    """joins texts into as few messages as possible, each no longer than limit"""
+    messages = []
+    message = ""
+    for text in texts:
+        text = text.strip()
+        if not text:
+            continue
+        joined = f"{message}\n\n{text}" if message else text
+        if len(joined) <= limit:
+            message = joined
+            continue
+        if message:
+            messages.append(message)
+        *full_parts, message = split_message(text, limit)
+        messages.extend(full_parts)
+    if message:
+        messages.append(message)
+    return messages
+
+
+class Outbox:
+    """
+    queues outgoing messages for each conversation
+    text sent to a conversation within window seconds is joined into one message
+    all conversations share a rate limit, and failed sends are retried with backoff
+    """
+
+    def __init__(self, window=0.25, rate=2, burst=5, retries=3, backoff=1):
+        self.window = window
+        self.retries = retries
+        self.backoff = backoff
+        self.bucket = TokenBucket(rate, burst)
+        self.queues = {}
+        self.senders = {}
+
+    def put(self, conv, text="", **attachment):
+        """
+        queues a message for conv, attachment is passed to conv.send_message
+        returns a future which is set to whether the message was sent
+        """
+        future = asyncio.get_event_loop().create_future()
+        self.queues.setdefault(conv.id_, []).append((text, attachment, future))
+        # a sender cancelled before it started never removes itself
+        if conv.id_ not in self.senders or self.senders[conv.id_].done():
+            self.senders[conv.id_] = asyncio.ensure_future(self.send_queue(conv))
+        return future
+
+    async def send_queue(self, conv):
+        """sends everything queued for conv"""
+        queue = []
+        try:
+            while self.queues.get(conv.id_):
+                # gives other replies time to arrive so they can be sent together
+                await asyncio.sleep(self.window)
+                queue = self.queues.pop(conv.id_)
+
+                texts = []
+                futures = []
+                for text, attachment, future in queue:
+                    if not attachment:
+                        texts.append(text)
+                        futures.append(future)
+                        continue
+                    # attachments are sent on their own, after the text before them
+                    await self.send_texts(conv, texts, futures)
+                    texts, futures = [], []
+                    future.set_result(await self.deliver(conv, text, attachment))
+                await self.send_texts(conv, texts, futures)
+        except asyncio.CancelledError:
+            # nothing queued for conv will be sent
+            for _, _, future in queue + self.queues.pop(conv.id_, []):
+                future.cancel()
+            raise
+        except Exception as error:
+            print(f"failed to send messages: {error!r}")
+            for _, _, future in queue:
+                if not future.done():
+                    future.set_exception(error)
+        finally:
+            del self.senders[conv.id_]
+        # messages queued while the failed messages were sent still need a sender
+        if self.queues.get(conv.id_):
+            self.senders[conv.id_] = asyncio.ensure_future(self.send_queue(conv))
+
+    async def send_texts(self, conv, texts, futures):
+        """sends texts joined into as few messages as possible"""
+        sent = True
+        for message in join_messages(texts):
+            sent = await self.deliver(conv, message) and sent
+        for future in futures:
+            future.set_result(sent)
+
+    async def deliver(self, conv, text, attachment=None):
+        """sends a message, retrying if it fails, returns whether it was sent"""
+        for attempt in range(self.retries + 1):
+            await self.bucket.take()
+            try:
+                await conv.send_message(utils.to_seg(text), **(attachment or {}))
+                return True
+            except hangups.NetworkError as error:
+                if attempt == self.retries:
+                    print(f"failed to send message: {error}")
+                    return False
+                await asyncio.sleep(self.backoff * 2 ** attempt)
+
+    async def flush(self):
+        """waits until every queued message has been sent"""
+        while self.senders:
+            await asyncio.gather(*self.senders.values())
@@ -35,7 +35,7 @@ class Inventory:
         puts an item into the inventory
         """
         # input validation
-        item_name = commands.send("remaining")
+        item_name = commands.remaining()
         item_is_valid = self.validate_item_name(item_name)
         if item_is_valid != "valid":
             return item_is_valid
@@ -57,7 +57,7 @@ class Inventory:
     def remove(self, commands):
         # input validation
         modifier = next(commands)
-        item_name = commands.send("remaining")
+        item_name = commands.remaining()
         item_is_valid = self.validate_item_name(item_name, modifier)
         if item_is_valid != "valid":
             return item_is_valid
@@ -80,7 +80,7 @@ class Inventory:
         """equips an item"""
         output_text = ""
         modifier = next(commands)
-        item_name = commands.send("remaining")
+        item_name = commands.remaining()
         full_name = utils.join_items(
             modifier, item_name, separator=' ', newlines=0)
 
@@ -103,7 +103,7 @@ class Inventory:
         return output_text
 
     def unequip(self, commands):
-        name = commands.send("remaining")
+        name = commands.remaining()
         try:
             type_ = classes.ItemType(name)
         except ValueError:
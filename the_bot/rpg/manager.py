@@ -1,12 +1,11 @@
 """
 manager for rpg
 """
-import datetime
-import random
 
 import rpg.classes as classes
 import rpg.player_class as player_class
 import rpg.rpg_class as rpg_class
+import game_utils
 import utils
 
 
@@ -18,7 +17,6 @@ class RPGManager:
 
     def __init__(self, load_sheets=True):
         self.load_game(load_sheets=load_sheets)
-        random.seed(datetime.datetime.now())
         self.save_game()
 
     def run_game(self, player_id, commands):
@@ -31,12 +29,18 @@ class RPGManager:
         if command != "register" and player_id not in self.game.players:
             return "You are not registered! Use register"
 
-        commands.send(-1)
-        return self.game.play_game(player_id, commands)
+        commands.rewind()
+        output_text = self.game.play_game(player_id, commands)
+        self.game.mark_changed(player_id)
+        return output_text
 
     def load_game(self, load_sheets):
         """loads the game"""
-        self.game.players, player_class.parties = utils.load("rpg_players", "rpg_parties")
+        self.game.players = player_class.players = utils.LazyRecords("rpg_players")
+        self.game.player_index = player_class.player_index = game_utils.PlayerIndex(
+            "rpg_names", self.game.players
+        )
+        player_class.parties = utils.Records.load("rpg_parties")
         if load_sheets:
             self.load_sheets_data()
 
@@ -85,5 +89,6 @@ class RPGManager:
 
     def save_game(self):
         """saves the game"""
-        utils.save(rpg_players=self.game.players, rpg_parties=player_class.parties)
-        player_class.players = self.game.players
+        self.game.players.save()
+        self.game.player_index.save()
+        player_class.parties.save()
@@ -27,7 +27,7 @@ class Player:
         Party(self.name)
 
     def get_id(self):
-        return utils.get_key(players, self)
+        return player_index.id_of(self.name)
 
     def modified_stats(self):
         """returns Stats() of player modified by player.equipped"""
@@ -182,7 +182,7 @@ class Player:
             self.stats.print_stats(self.inventory.modifers(), list_=True)
         ], mode="long")
 
-    def join(self, commands=utils.command_parser(""), has_permission=False, party_name=""):
+    def join(self, commands=utils.CommandParser(""), has_permission=False, party_name=""):
         """adds player to a party"""
         output_text = ""
         party_name = utils.default(party_name, next(commands))
@@ -194,7 +194,7 @@ class Player:
         if party is None:
             return "that party does not exist"
 
-        host = game_utils.get_players(players, party.host_name, single=True)
+        host = game_utils.get_players(player_index, party.host_name, single=True)
         if host.options["auto_join_party"] or has_permission:
             output_text += self.leave(self.party_name, joining=True)
             if not output_text.startswith("left"):
@@ -243,7 +243,7 @@ class Player:
 
         party.join_requests.remove(player_name)
         return utils.newline(
-            game_utils.get_players(players, player_name, single=True).join(
+            game_utils.get_players(player_index, player_name, single=True).join(
                 party_name=self.party_name, has_permission=True
             )
         )
@@ -271,7 +271,7 @@ class Player:
         for player_name in party.player_names:
             if kick_name == player_name:
                 game_utils.get_players(
-                    players, player_name, single=True
+                    player_index, player_name, single=True
                 ).leave(commands)
                 return f"{kick_name} has been kicked from your party"
 
@@ -373,10 +373,7 @@ class Party:
         output_text = f"it is {self.doing_stuff}'s turn"
         if self.doing_stuff in self.fighting:
             output_text += self.fighting[self.doing_stuff].attack(
-                random.choice([
-                    player for player in players.values()
-                    if player.name in self.all_players()
-                ])
+                random.choice([player_index.get(name) for name in self.all_players()])
             )
             self.doing_stuff = None
         return utils.newline(output_text)
@@ -390,7 +387,7 @@ class Party:
                         speed = self.fighting[name].stats.speed
                     elif name in self.all_players():
                         speed = game_utils.get_players(
-                            players, name, single=True).stats.speed
+                            player_index, name, single=True).stats.speed
                     if self.counter % speed == 0:
                         self.action_queue.append(name)
                 random.shuffle(self.action_queue)
@@ -400,7 +397,7 @@ class Party:
         # get enemies from room
         enemy = classes.rooms[
             game_utils.get_players(
-                players, self.host_name, single=True).room
+                player_index, self.host_name, single=True).room
         ].generate_enemy()
         self.fighting[enemy.name] = enemy
         self.next_turn()
@@ -415,4 +412,5 @@ class Party:
 
 
 players = {}
+player_index = None
 parties = {}
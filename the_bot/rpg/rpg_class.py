@@ -1,15 +1,16 @@
 
+import command_registry
 import game_utils
 import rpg.classes as classes
 import rpg.inventory_class as inventory_class
 import rpg.player_class as player_class
-import utils
 
 
 class RPG:
     """the RPG"""
     all_items = classes.all_items
     players = player_class.players
+    player_index = player_class.player_index
     rooms = classes.rooms
 
     def __init__(self):
@@ -25,44 +26,72 @@ class RPG:
         # input validation
         if not name:
             return "you must provide a name"
-        elif name in [player.name for player in self.players.values()]:
+        elif self.player_index.id_of(name) is not None:
             return "that name is taken by a player"
         elif name.isdigit():
             return "names cannot be numbers"
 
         self.players[player_id] = player_class.Player(name=name)
+        self.player_index.set_name(player_id, name)
         return "Successfully registered!"
 
+    def mark_changed(self, player_id):
+        """marks a player and their party as changed so they are saved"""
+        player = self.players.get(player_id, None)
+        if player is None:
+            return
+        self.players.mark(player_id)
+        party = player_class.parties.get(player.party_name, None)
+        if party:
+            # fights can change any player in the party
+            self.players.mark(*[self.player_index.id_of(name) for name in party.all_players()])
+        player_class.parties.mark(player.party_name)
+
     def play_game(self, player_id, commands):
         """runs functions based on player command"""
-        command = next(commands)
-        output_text = ""
+        command = command_registry.resolve("rpg", next(commands))
+        if command is None:
+            return "invalid command for rpg"
         player = self.players.get(player_id, None)
-        if command == "register":
-            output_text = self.register(player_id, commands)
-        elif command == "help":
-            output_text = utils.join_items(
-                ("inventory", *inventory_class.Inventory.commands),
-                ("player", "register", "profile", *player_class.Player.commands),
-                ("other", "help"),
-                ("combat", *player_class.Player.fight_commands),
-                description_mode="long"
-            )
-        elif command == "profile":
-            output_text = game_utils.profile(self, player, commands)
-
-        elif command in inventory_class.Inventory.commands:
-            output_text = inventory_class.Inventory.commands[command](
-                player.inventory, commands)
-        elif command in player_class.Player.commands:
-            output_text = player_class.Player.commands[command](
-                player, commands
-            )
-        elif command in player_class.Player.fight_commands:
-            output_text = player.fight_action(
-                player_class.Player.fight_commands[command], commands
-            )
-        else:
-            output_text = "invalid command for rpg"
-
-        return output_text
+        return command.function(self, player_id, player, commands)
+
+    def help_(self, player_id, player, commands):
+        """returns help text"""
+        return command_registry.help_text("rpg")
+
+    def profile(self, player_id, player, commands):
+        """returns player profiles"""
+        return game_utils.profile(self, player, commands)
+
+
+# every rpg command is called with the game, player id, player and commands
+def inventory_command(function):
+    """lets inventory commands be called like the other rpg commands"""
+    return lambda game, player_id, player, commands: function(player.inventory, commands)
+
+
+def player_command(function):
+    """lets player commands be called like the other rpg commands"""
+    return lambda game, player_id, player, commands: function(player, commands)
+
+
+def fight_command(function):
+    """lets fight commands be called like the other rpg commands"""
+    return lambda game, player_id, player, commands: player.fight_action(function, commands)
+
+
+command_registry.register_all(
+    "rpg", inventory_class.Inventory.commands,
+    category="inventory", wrapper=inventory_command
+)
+command_registry.register(
+    "rpg", "register",
+    lambda game, player_id, player, commands: game.register(player_id, commands),
+    category="player"
+)
+command_registry.register("rpg", "profile", RPG.profile, category="player")
+command_registry.register_all(
+    "rpg", player_class.Player.commands, category="player", wrapper=player_command)
+command_registry.register("rpg", "help", RPG.help_, category="other")
+command_registry.register_all(
+    "rpg", player_class.Player.fight_commands, category="combat", wrapper=fight_command)
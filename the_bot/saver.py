@@ -0,0 +1,90 @@
+"""
+saves data in the background so writing to disk does not block the bot
+"""
+import atexit
+import threading
+
+import utils
+
+
+class Saver:
+    """queues saved records and writes them from a background thread"""
+
+    def __init__(self, interval=1000, max_commands=20):
+        self.interval = interval / 1000
+        self.max_commands = max_commands
+        self.pending = {}
+        self.writing = {}
+        self.commands = 0
+        self.running = False
+        self.thread = None
+        self.lock = threading.Lock()
+        self.write_lock = threading.Lock()
+        self.wake = threading.Event()
+
+    def start(self):
+        """starts saving in the background"""
+        if self.running:
+            return
+        self.running = True
+        self.thread = threading.Thread(target=self.run, name="saver", daemon=True)
+        self.thread.start()
+        atexit.register(self.stop)
+
+    def queue(self, changes):
+        """queues pickled records, replacing older changes to the same record"""
+        with self.lock:
+            # replaced changes move to the end, so records are written in the order they changed
+            for key in changes:
+                self.pending.pop(key, None)
+            self.pending.update(changes)
+
+    def get(self, table, key):
+        """returns the pickled record if it has not been written yet, otherwise None"""
+        with self.lock:
+            return self.pending.get((table, key), self.writing.get((table, key)))
+
+    def command_done(self):
+        """counts a command, saving early once max_commands have run"""
+        with self.lock:
+            self.commands += 1
+            if self.commands >= self.max_commands:
+                self.wake.set()
+
+    def run(self):
+        """saves pending records every interval until stopped"""
+        while self.running:
+            self.wake.wait(self.interval)
+            self.wake.clear()
+            self.flush()
+
+    def flush(self):
+        """writes all pending records"""
+        with self.write_lock:
+            # data files (eg. the economy ledger) reach the disk before the records based on them
+            for sync in list(utils.file_syncs.values()):
+                sync()
+            with self.lock:
+                # changes stay in self.writing until they are written so get() can find them
+                self.writing, self.pending = self.pending, {}
+                self.commands = 0
+            if not self.writing:
+                return
+            try:
+                utils.storage_backend.write(self.writing)
+            except Exception as error:
+                # keeps the changes so the next flush tries again
+                with self.lock:
+                    self.pending = {**self.writing, **self.pending}
+                print(f"failed to save: {error}")
+            finally:
+                with self.lock:
+                    self.writing = {}
+
+    def stop(self):
+        """stops saving in the background and writes anything left"""
+        self.running = False
+        self.wake.set()
+        if self.thread:
+            self.thread.join()
+        self.flush()
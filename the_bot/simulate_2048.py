@@ -0,0 +1,135 @@
+"""
+plays 2048 games without the bot to measure how fast the game runs
+run with python the_bot/simulate_2048.py, see --help for options
+"""
+import argparse
+import collections
+import multiprocessing
+import pickle
+import random
+import time
+import tracemalloc
+
+from game_2048 import classes, solver
+
+
+def positive_int(text):
+    """argparse type for options which need at least 1"""
+    value = int(text)
+    if value < 1:
+        raise argparse.ArgumentTypeError(f"{value} is less than 1")
+    return value
+
+
+parser = argparse.ArgumentParser(description="plays 2048 games and reports how fast they ran")
+parser.add_argument(
+    "-g", "--games", dest="games", default=1000, type=positive_int,
+    help="how many games to play in each mode",
+)
+parser.add_argument(
+    "-m", "--modes", dest="modes", nargs="+", default=list(classes.Game.modes),
+    choices=list(classes.Game.modes),
+    help="the modes to play (all by default)",
+)
+parser.add_argument(
+    "--policy", dest="policy", default="random", choices=["random", "heuristic"],
+    help="how moves are picked, heuristic picks the move the solver scores best without searching",
+)
+parser.add_argument(
+    "--max-moves", dest="max_moves", default=5000, type=int,
+    help="games stop after this many moves even if they have not been lost",
+)
+parser.add_argument(
+    "-p", "--processes", dest="processes", default=1, type=int,
+    help="how many processes play games, 0 uses every core",
+)
+parser.add_argument(
+    "--memory-samples", dest="memory_samples", default=20, type=positive_int,
+    help="how many games of each mode are replayed to measure memory",
+)
+
+Result = collections.namedtuple("Result", "mode_name seed moves score seconds")
+DIRECTIONS = [direction.value for direction in classes.Directions]
+
+
+def random_move(game, chooser):
+    return chooser.choice(DIRECTIONS)
+
+
+def heuristic_move(game, chooser):
+    # with no time to search, the solver picks the move leaving the best board
+    direction, _ = solver.best_move(game.board.values, game.mode(), 0)
+    return direction.value
+
+
+policies = {
+    "random": random_move,
+    "heuristic": heuristic_move,
+}
+
+
+def play(task):
+    """plays a game until it is lost (or max_moves), returns a Result"""
+    mode_name, seed, policy_name, max_moves = task
+    policy = policies[policy_name]
+    chooser = random.Random(seed)
+    start = time.perf_counter()
+    game = classes.Game("simulation", mode_name, seed)
+    while len(game.moves) < max_moves and game.board.check_can_move():
+        game.move_direction(policy(game, chooser))
+    return Result(mode_name, seed, str(game.moves), game.score, time.perf_counter() - start)
+
+
+def memory_per_game(results):
+    """returns the average bytes in memory and bytes saved of the games in results"""
+    tracemalloc.start()
+    games = [
+        classes.Game.replay("simulation", result.mode_name, result.seed, result.moves)
+        for result in results
+    ]
+    saved_bytes = sum(len(pickle.dumps(game)) for game in games)
+    # the memory freed by deleting the games, so shared lookup tables are not counted
+    memory_with_games = tracemalloc.get_traced_memory()[0]
+    del games
+    memory = memory_with_games - tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return memory / len(results), saved_bytes / len(results)
+
+
+def main():
+    args = parser.parse_args()
+    tasks = [
+        (mode_name, seed, args.policy, args.max_moves)
+        for mode_name in args.modes
+        for seed in range(args.games)
+    ]
+
+    start = time.perf_counter()
+    if args.processes == 1:
+        results = [play(task) for task in tasks]
+    else:
+        with multiprocessing.Pool(args.processes or None) as pool:
+            results = pool.map(play, tasks, chunksize=max(1, len(tasks) // 100))
+    seconds = time.perf_counter() - start
+
+    results_by_mode = collections.defaultdict(list)
+    for result in results:
+        results_by_mode[result.mode_name].append(result)
+
+    print(f"{len(results)} games with {args.policy} moves, {args.processes or 'every'} processes")
+    for mode_name, mode_results in results_by_mode.items():
+        moves = sum(len(result.moves) for result in mode_results)
+        memory, saved_bytes = memory_per_game(mode_results[:args.memory_samples])
+        print(
+            f"{mode_name}: "
+            f"{moves / sum(result.seconds for result in mode_results):.0f} moves per second, "
+            f"{moves / len(mode_results):.0f} moves and "
+            f"{sum(result.score for result in mode_results) / len(mode_results):.0f} points per game, "
+            f"{memory / 1024:.1f} KiB in memory and {saved_bytes / 1024:.1f} KiB saved per game"
+        )
+    total_moves = sum(len(result.moves) for result in results)
+    print(f"total: {total_moves / seconds:.0f} moves per second")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,181 @@
+"""
+backends for saving and loading data
+each backend stores tables of pickled records, one record per key
+"""
+import ast
+import dbm
+import pickle
+import sqlite3
+import threading
+
+
+class DbmStorage:
+    """stores records in a dbm file, the same file shelve used"""
+
+    def __init__(self, file_name, tables):
+        self.file_name = file_name
+        self.tables = tables
+        # saving happens in the saver thread, and dbm files cannot be opened by two threads at once
+        self.lock = threading.Lock()
+        with self.lock, dbm.open(self.file_name, "c") as save_file:
+            for table in tables:
+                self.upgrade_table(save_file, table)
+
+    def record_key(self, table, key):
+        """returns the key a record is saved under"""
+        return f"{table}/{key!r}"
+
+    def upgrade_table(self, save_file, table):
+        """older saves stored a whole table as a single dict, this splits it into records"""
+        if table not in save_file:
+            return
+        for key, record in pickle.loads(save_file[table]).items():
+            save_file[self.record_key(table, key)] = pickle.dumps(record)
+        del save_file[table]
+
+    def keys(self, table):
+        """returns the keys of all records in a table"""
+        prefix = f"{table}/"
+        with self.lock, dbm.open(self.file_name, "c") as save_file:
+            return [
+                ast.literal_eval(key.decode()[len(prefix):])
+                for key in save_file.keys()
+                if key.decode().startswith(prefix)
+            ]
+
+    def load_record(self, table, key):
+        """loads a single record"""
+        with self.lock, dbm.open(self.file_name, "c") as save_file:
+            return pickle.loads(save_file[self.record_key(table, key)])
+
+    def load_table(self, table):
+        """loads all records from a table"""
+        records = {}
+        prefix = f"{table}/"
+        with self.lock, dbm.open(self.file_name, "c") as save_file:
+            for key in save_file.keys():
+                key = key.decode()
+                if key.startswith(prefix):
+                    records[ast.literal_eval(key[len(prefix):])] = pickle.loads(save_file[key])
+        return records
+
+    def write(self, changes):
+        """
+        writes changes into the save file
+
+        Args:
+            changes - dict of (table, key) to the pickled record, or None to delete the record
+        """
+        with self.lock, dbm.open(self.file_name, "c") as save_file:
+            for (table, key), data in changes.items():
+                key = self.record_key(table, key)
+                if data is not None:
+                    save_file[key] = data
+                    continue
+                try:
+                    del save_file[key]
+                except KeyError:
+                    pass
+
+    def wipe(self, tables):
+        """deletes all records in tables"""
+        with self.lock, dbm.open(self.file_name, "c") as save_file:
+            for key in save_file.keys():
+                if key.decode().split("/")[0] in tables:
+                    del save_file[key]
+
+    def close(self):
+        """dbm files are closed after every use"""
+        pass
+
+
+class SQLiteStorage:
+    """stores records as rows in a sqlite database, one sql table per table"""
+
+    def __init__(self, file_name, tables):
+        self.file_name = f"{file_name}.sqlite3"
+        self.tables = tables
+        # saving happens in the saver thread, so access is guarded by a lock instead
+        self.connection = sqlite3.connect(self.file_name, check_same_thread=False)
+        self.lock = threading.Lock()
+        with self.lock, self.connection:
+            self.connection.execute("PRAGMA journal_mode=WAL")
+            self.connection.execute("PRAGMA synchronous=NORMAL")
+            for table in self.tables:
+                self.connection.execute(
+                    f"CREATE TABLE IF NOT EXISTS {table} "
+                    "(key TEXT PRIMARY KEY, data BLOB NOT NULL)"
+                )
+
+    def check_table(self, table):
+        """makes sure table is a known table, since table names go directly into the sql"""
+        if table not in self.tables:
+            raise ValueError(f"table {table} does not exist")
+
+    def keys(self, table):
+        """returns the keys of all records in a table"""
+        self.check_table(table)
+        with self.lock:
+            rows = self.connection.execute(f"SELECT key FROM {table}").fetchall()
+        return [ast.literal_eval(key) for key, in rows]
+
+    def load_record(self, table, key):
+        """loads a single record"""
+        self.check_table(table)
+        with self.lock:
+            row = self.connection.execute(
+                f"SELECT data FROM {table} WHERE key = ?", (repr(key), )
+            ).fetchone()
+        if row is None:
+            raise KeyError(key)
+        return pickle.loads(row[0])
+
+    def load_table(self, table):
+        """loads all records from a table"""
+        self.check_table(table)
+        with self.lock:
+            rows = self.connection.execute(f"SELECT key, data FROM {table}").fetchall()
+        return {ast.literal_eval(key): pickle.loads(data) for key, data in rows}
+
+    def write(self, changes):
+        """
+        writes changes in one transaction
+
+        Args:
+            changes - dict of (table, key) to the pickled record, or None to delete the record
+        """
+        saved = {}
+        deleted = {}
+        for (table, key), data in changes.items():
+            self.check_table(table)
+            if data is None:
+                deleted.setdefault(table, []).append((repr(key), ))
+            else:
+                saved.setdefault(table, []).append((repr(key), data))
+
+        with self.lock, self.connection:
+            for table, rows in saved.items():
+                self.connection.executemany(
+                    f"INSERT OR REPLACE INTO {table} (key, data) VALUES (?, ?)", rows
+                )
+            for table, keys in deleted.items():
+                self.connection.executemany(f"DELETE FROM {table} WHERE key = ?", keys)
+
+    def wipe(self, tables):
+        """deletes all records in tables"""
+        for table in tables:
+            self.check_table(table)
+        with self.lock, self.connection:
+            for table in tables:
+                self.connection.execute(f"DELETE FROM {table}")
+
+    def close(self):
+        """closes the database"""
+        with self.lock:
+            self.connection.close()
+
+
+backends = {
+    "dbm": DbmStorage,
+    "sqlite": SQLiteStorage,
+}
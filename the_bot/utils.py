@@ -2,17 +2,27 @@
 assorted useful functions
 """
 import hangups
-import shelve
-import inspect
+import atexit
+import collections
 import pickle
 import os.path
 
-data_keys = {
-    "eco": {"economy_players": {}},
-    "2048": {"games_2048": {"current game": None}, "scores_2048": {}},
-    "rpg": {"rpg_players": {}, "rpg_parties": {}}
+import storage
+
+data_tables = {
+    "eco": ("economy_players", "economy_balances", "economy_names", "economy_checkpoint"),
+    "2048": ("players_2048", "games_2048", "scores_2048"),
+    "rpg": ("rpg_players", "rpg_parties", "rpg_names"),
+}
+# data kept in its own file next to the save file, named {save file}_{name}
+data_files = {
+    "eco": ("economy_ledger", ),
 }
-save_file_name = "save_data"
+storage_backend = None  # set by open_storage
+save_file = "save_data"  # set by open_storage
+saver = None  # when set, saved records are queued here instead of written right away
+# name to a function syncing a data file, which the saver calls before writing records
+file_syncs = {}
 
 
 # hangouts
@@ -109,29 +119,216 @@ def description(name, *description, mode="short", end="\n", newlines=1):
 
 
 # save and load data
+def open_storage(backend="dbm", file_name="save_data"):
+    """sets the backend used to save and load data"""
+    global storage_backend, save_file
+    save_file = file_name
+    storage_backend = storage.backends[backend](
+        file_name, [table for tables in data_tables.values() for table in tables]
+    )
+    atexit.register(storage_backend.close)
+
+
 def wipe_data(game):
     """wipes data from save_data"""
     if not game:
         return
-    save(**data_keys[game])
+    storage_backend.wipe(data_tables[game])
+    for name in data_files.get(game, ()):
+        if os.path.exists(data_file(name)):
+            os.remove(data_file(name))
 
 
-def save(**contents):
-    """saves data into a file"""
-    with shelve.open(save_file_name, writeback=True) as save_file:
-        for name, data in contents.items():
-            save_file[name] = data
+def data_file(name):
+    """returns the name of a file kept next to the save file"""
+    return f"{save_file}_{name}"
 
 
-def load(*names):
-    """loads data from a file"""
-    data = []
-    with shelve.open(save_file_name) as save_file:
-        for name in names:
-            data.append(save_file[name])
-    if len(data) == 1:
-        data = data[0]
-    return data
+def save_records(table, records, removed=()):
+    """saves each record in records under its own key and deletes removed records"""
+    changes = {(table, key): pickle.dumps(record) for key, record in records.items()}
+    changes.update({(table, key): None for key in removed})
+    if saver:
+        saver.queue(changes)
+    else:
+        storage_backend.write(changes)
+
+
+def load_records(table):
+    """loads all records from a table"""
+    return storage_backend.load_table(table)
+
+
+class Records(dict):
+    """
+    dict of objects which are saved one record per key
+    keeps track of changed keys so saving only writes those
+    """
+
+    def __init__(self, table, records=()):
+        super().__init__(records)
+        self.table = table
+        self.changed = set()
+        self.removed = set()
+
+    def __setitem__(self, key, value):
+        super().__setitem__(key, value)
+        self.mark(key)
+
+    def __delitem__(self, key):
+        super().__delitem__(key)
+        self.changed.discard(key)
+        self.removed.add(key)
+
+    def pop(self, key, *default):
+        if key not in self:
+            return super().pop(key, *default)
+        value = self[key]
+        del self[key]
+        return value
+
+    def mark(self, *keys):
+        """marks keys as changed so they are saved"""
+        for key in keys:
+            if key in self:
+                self.changed.add(key)
+                self.removed.discard(key)
+
+    def save(self):
+        """saves changed records and deletes removed records"""
+        if self.changed or self.removed:
+            save_records(
+                self.table, {key: self[key] for key in self.changed}, self.removed
+            )
+        self.changed.clear()
+        self.removed.clear()
+
+    @classmethod
+    def load(cls, table):
+        """loads a table into Records"""
+        return cls(table, load_records(table))
+
+
+class LazyRecords(Records):
+    """
+    Records which loads each record the first time its key is used
+    after saving, only the max_loaded most recently used records (and pinned records) stay loaded
+    """
+    max_loaded = 1000
+
+    def __init__(self, table, on_load=None):
+        super().__init__(table)
+        self.on_load = on_load
+        self.recent = collections.OrderedDict()
+        # keys of records still being changed by commands which have not finished
+        self.pinned = collections.Counter()
+        self._all_keys = None
+
+    @property
+    def all_keys(self):
+        """keys of all records, loaded or not"""
+        if self._all_keys is None:
+            self._all_keys = set(storage_backend.keys(self.table))
+        return self._all_keys
+
+    def load_record(self, key):
+        """loads a record from the saver or the storage backend"""
+        data = saver.get(self.table, key) if saver else None
+        if data is None:
+            record = storage_backend.load_record(self.table, key)
+        else:
+            record = pickle.loads(data)
+        if self.on_load:
+            self.on_load(key, record)
+        dict.__setitem__(self, key, record)
+
+    def __getitem__(self, key):
+        if not dict.__contains__(self, key):
+            if key not in self.all_keys:
+                raise KeyError(key)
+            self.load_record(key)
+        self.recent[key] = None
+        self.recent.move_to_end(key)
+        return dict.__getitem__(self, key)
+
+    def __setitem__(self, key, value):
+        self.all_keys.add(key)
+        super().__setitem__(key, value)
+        self.recent[key] = None
+        self.recent.move_to_end(key)
+
+    def __delitem__(self, key):
+        if key not in self.all_keys:
+            raise KeyError(key)
+        dict.pop(self, key, None)
+        self.recent.pop(key, None)
+        self.all_keys.discard(key)
+        self.changed.discard(key)
+        self.removed.add(key)
+
+    def __contains__(self, key):
+        return key in self.all_keys
+
+    def __iter__(self):
+        return iter(self.keys())
+
+    def __len__(self):
+        return len(self.all_keys)
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def keys(self):
+        return list(self.all_keys)
+
+    def values(self):
+        return (self[key] for key in self.keys())
+
+    def items(self):
+        return ((key, self[key]) for key in self.keys())
+
+    def mark(self, *keys):
+        """marks loaded keys as changed so they are saved"""
+        super().mark(*[key for key in keys if dict.__contains__(self, key)])
+
+    def save(self):
+        """saves changed records, then unloads the least recently used records"""
+        super().save()
+        self.unload()
+
+    def pin(self, key):
+        """keeps a record loaded until it is unpinned"""
+        self.pinned[key] += 1
+
+    def unpin(self, key):
+        """lets a pinned record be unloaded again"""
+        self.pinned[key] -= 1
+        if self.pinned[key] <= 0:
+            del self.pinned[key]
+
+    def unload(self):
+        """unloads records until at most max_loaded are loaded, saving changed ones"""
+        excess = len(self.recent) - self.max_loaded
+        if excess <= 0:
+            return
+        unloaded = {}
+        # pinned records are skipped, so they stay loaded even if they are the oldest
+        for key in list(self.recent):
+            if key in self.pinned:
+                continue
+            del self.recent[key]
+            record = dict.pop(self, key)
+            if key in self.changed:
+                self.changed.discard(key)
+                unloaded[key] = record
+            excess -= 1
+            if not excess:
+                break
+        if unloaded:
+            save_records(self.table, unloaded)
 
 
 def to_dict(obj):
@@ -151,29 +348,41 @@ def clean(text, split=True):
         return [""]
 
 
-def command_parser(command_text):
+class CommandParser:
     """
-    returns a generator of commands
-    generator yields empty string if there are no more commands
+    cursor over the words of a message
+    returns an empty string once there are no more words
     """
-    commands = clean(command_text)
-    current_index = 0
-    val = None
-    while True:
-        if isinstance(val, int):
-            current_index += val
-            current_index = clamp(current_index, 0, len(commands))
-            item = get_item(commands, indexes=(current_index, ))
-        elif val == "remaining":
-            item = join_items(*commands[current_index:], separator=" ", newlines=0)
-        elif val == "all":
-            item = commands
-        elif val == "raw":
-            item = command_text
-        else:
-            item = get_item(commands, indexes=(current_index, ))
-            current_index += 1
-        val = yield item
+    __slots__ = ("text", "words", "index")
+
+    def __init__(self, text):
+        self.text = text
+        self.words = text.lower().split() if text else []
+        self.index = 0
+
+    def __next__(self):
+        index = self.index
+        self.index = index + 1
+        return self.words[index] if index < len(self.words) else ""
+
+    next = __next__
+
+    def rewind(self, number=1):
+        """moves back number words and returns the word there"""
+        self.index = clamp(self.index - number, 0, len(self.words))
+        return self.words[self.index] if self.index < len(self.words) else ""
+
+    def remaining(self):
+        """returns the unused words joined with spaces"""
+        return " ".join(self.words[self.index:])
+
+    def all(self):
+        """returns all the words"""
+        return self.words
+
+    def raw(self):
+        """returns the text the words came from"""
+        return self.text
 
 
 # get things without errors
@@ -182,8 +391,6 @@ def get_item(sequence, indexes=(0, ), default=""):
     Retrives the items at the indexes in sequence
     defaults to default if the item does not exist
     """
-    if inspect.isgenerator(sequence):
-        return next(sequence)
     items = []
     for index in indexes:
         try: